@@ -72,6 +72,16 @@ def on_reload(server):
 
 def when_ready(server):
     """Called just after the server is started."""
+    import asyncio
+
+    from config import settings
+
+    # Register the Telegram webhook once, before any worker is forked
+    if settings.USE_WEBHOOK:
+        from core.bot import register_webhook
+
+        asyncio.run(register_webhook())
+
     print(f"Gunicorn is ready. Listening on {bind}")
 
 
@@ -80,6 +90,24 @@ def on_exit(server):
     print("Shutting down Gunicorn...")
 
 
+def post_fork(server, worker):
+    """Called just after a worker has been forked."""
+    from core.bot import reset_bot_session
+    from core.executor import event_executor, event_lanes
+    from core.ratelimit import telegram_limiter
+    from database.config import init_engine
+
+    # The preloaded app built these in the master; never share them across processes
+    init_engine(workers=server.cfg.workers)
+    reset_bot_session()
+
+    # Sized from the worker's pool, which depends on the number of workers
+    event_executor.configure(max_active_lanes=event_lanes(workers=server.cfg.workers))
+
+    # Telegram limits apply to the bot, so every worker gets an equal share
+    telegram_limiter.configure(processes=server.cfg.workers)
+
+
 def worker_int(worker):
     """Called just after a worker exited on SIGINT or SIGQUIT."""
     print(f"Worker {worker.pid} received SIGINT/SIGQUIT")
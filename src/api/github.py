@@ -1,13 +1,98 @@
 from fastapi import APIRouter, Request, HTTPException, status
+from fastapi.responses import JSONResponse
 
 from config import settings
 from core import get_logger
+from core.decorators import GitHubEventRegistry
+from core.dedup import deduplicator
+from core.queue import delivery_queue
+from core.utils.metrics import metrics
 from handlers.github.models.events import BaseEvent
 from handlers.github.models.headers import WebhookHeaders
 
 
 logger = get_logger(__name__)
 
+# Webhook events GitHub sends; any other header value is counted as "other"
+GITHUB_EVENT_NAMES = frozenset(
+    {
+        "branch_protection_configuration",
+        "branch_protection_rule",
+        "check_run",
+        "check_suite",
+        "code_scanning_alert",
+        "commit_comment",
+        "create",
+        "custom_property",
+        "custom_property_values",
+        "delete",
+        "dependabot_alert",
+        "deploy_key",
+        "deployment",
+        "deployment_protection_rule",
+        "deployment_review",
+        "deployment_status",
+        "discussion",
+        "discussion_comment",
+        "fork",
+        "github_app_authorization",
+        "gollum",
+        "installation",
+        "installation_repositories",
+        "installation_target",
+        "issue_comment",
+        "issues",
+        "label",
+        "marketplace_purchase",
+        "member",
+        "membership",
+        "merge_group",
+        "meta",
+        "milestone",
+        "org_block",
+        "organization",
+        "package",
+        "page_build",
+        "personal_access_token_request",
+        "ping",
+        "project",
+        "project_card",
+        "project_column",
+        "projects_v2",
+        "projects_v2_item",
+        "projects_v2_status_update",
+        "public",
+        "pull_request",
+        "pull_request_review",
+        "pull_request_review_comment",
+        "pull_request_review_thread",
+        "push",
+        "registry_package",
+        "release",
+        "repository",
+        "repository_advisory",
+        "repository_dispatch",
+        "repository_import",
+        "repository_ruleset",
+        "repository_vulnerability_alert",
+        "secret_scanning_alert",
+        "secret_scanning_alert_location",
+        "secret_scanning_scan",
+        "security_advisory",
+        "security_and_analysis",
+        "sponsorship",
+        "star",
+        "status",
+        "sub_issues",
+        "team",
+        "team_add",
+        "watch",
+        "workflow_dispatch",
+        "workflow_job",
+        "workflow_run",
+    }
+)
+
 router = APIRouter(prefix="/github", tags=["github"])
 
 
@@ -15,6 +100,11 @@ router = APIRouter(prefix="/github", tags=["github"])
 async def github_webhook(request: Request):
     """Handle incoming webhook requests from GitHub"""
 
+    # Ignore unhandled events from the event header alone, without reading the body
+    event_name = request.headers.get("X-GitHub-Event")
+    if event_name and not GitHubEventRegistry.is_handled(event_name):
+        return _ignore_event(request, event_name)
+
     # Validate webhook headers
     try:
         headers = WebhookHeaders.model_validate(request.headers)
@@ -30,12 +120,27 @@ async def github_webhook(request: Request):
         logger.warning("No handler registered for event type: %s", event_type.value)
         return {"status": "ignored", "reason": "no_handler"}
 
-    # Parse request body
+    # Drop deliveries this worker has already seen before reading the body
+    if settings.GH_DEDUP_ENABLED and deduplicator.seen(headers.delivery):
+        logger.info("Skipping duplicate delivery %s", headers.delivery)
+        return {"status": "ignored", "reason": "duplicate"}
+
+    # Verify the signature over the raw body before any parsing
+    secrets = settings.gh_webhook_secrets
+    if secrets and not headers.verify_signature(await request.body(), secrets):
+        logger.warning("Invalid signature for delivery %s", headers.delivery)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    # Claim the delivery across workers once it is known to come from GitHub
     try:
-        payload = await headers.extract_payload(request)
+        claimed = not settings.GH_DEDUP_ENABLED or await deduplicator.claim(headers.delivery)
     except Exception as e:
-        logger.error("Failed to parse request body: %s", e)
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+        logger.error("Failed to claim delivery %s: %s", headers.delivery, e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process webhook")
+
+    if not claimed:
+        logger.info("Skipping duplicate delivery %s", headers.delivery)
+        return {"status": "ignored", "reason": "duplicate"}
 
     # Parse payload into appropriate event model
     event_model: BaseEvent = headers.get_event_model()
@@ -43,8 +148,36 @@ async def github_webhook(request: Request):
         logger.error("No event model defined for event type: %s", event_type.value)
         return {"status": "error", "reason": "no_event_model"}
 
+    # Read request body
+    try:
+        if settings.GH_WEBHOOK_SINGLE_PASS or settings.GH_WEBHOOK_ASYNC:
+            payload = await headers.extract_raw_payload(request)
+        else:
+            payload = await headers.extract_payload(request)
+    except Exception as e:
+        logger.error("Failed to parse request body: %s", e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload")
+
+    # Acknowledge right away and leave processing to the queue consumers
+    if settings.GH_WEBHOOK_ASYNC:
+        try:
+            await delivery_queue.enqueue(event_type=event_type, delivery_id=headers.delivery, payload=payload)
+        except Exception as e:
+            logger.error("Failed to queue %s delivery: %s", event_type.value, e, exc_info=True)
+            await _release_delivery(headers.delivery)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to queue webhook")
+
+        logger.info("Queued %s delivery %s", event_type.value, headers.delivery)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"status": "queued", "event_type": event_type.value},
+        )
+
     try:
-        event = event_model.model_validate(payload)
+        if settings.GH_WEBHOOK_SINGLE_PASS:
+            event = event_model.from_json(payload)
+        else:
+            event = event_model.model_validate(payload)
     except Exception as e:
         logger.error("Failed to parse %s event payload: %s", event_type.value, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {event_type.value} event payload")
@@ -56,4 +189,28 @@ async def github_webhook(request: Request):
         return {"status": "processed", "event_type": event_type.value}
     except Exception as e:
         logger.error("Error handling %s event: %s", event_type.value, e, exc_info=True)
+        await _release_delivery(headers.delivery)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to process webhook")
+
+
+def _ignore_event(request: Request, event_name: str) -> JSONResponse:
+    """Acknowledge an event nobody handles and account for the body left unread"""
+
+    # The header is not authenticated yet, so only known event names become labels
+    label = event_name if event_name in GITHUB_EVENT_NAMES else "other"
+    skipped_bytes = int(request.headers.get("Content-Length") or 0)
+
+    metrics.counter("github_ignored_total", event=label).inc()
+    metrics.counter("github_ignored_bytes_total", event=label).inc(skipped_bytes)
+    logger.debug("Ignoring %s event (%d bytes unread)", label, skipped_bytes)
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "ignored", "reason": "no_handler", "event_type": label},
+    )
+
+
+async def _release_delivery(delivery_id: str) -> None:
+    """Let GitHub redeliver a delivery that could not be processed"""
+    if settings.GH_DEDUP_ENABLED:
+        await deduplicator.release(delivery_id)
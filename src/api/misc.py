@@ -1,5 +1,9 @@
+import os
+
 from fastapi import APIRouter
 
+from core.utils.metrics import metrics as metrics_registry
+
 router = APIRouter(prefix="/misc", tags=["misc"])
 
 
@@ -7,3 +11,9 @@ router = APIRouter(prefix="/misc", tags=["misc"])
 async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@router.get("/metrics")
+async def metrics():
+    """Metrics of the worker that served the request"""
+    return {"pid": os.getpid(), "metrics": metrics_registry.snapshot()}
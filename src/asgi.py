@@ -10,6 +10,8 @@ from core import get_logger
 from config import settings
 from api import setup_api_routers
 from core.bot import init_bot, shutdown_bot
+from core.services import start_services, stop_services
+from database import close_db
 
 logger = get_logger(__name__)
 
@@ -28,6 +30,7 @@ async def lifespan(app: FastAPI):
     try:
         await init_bot()
         logger.info("Bot initialized successfully")
+        await start_services()
     except Exception as e:
         logger.error(f"Failed to initialize bot: {e}", exc_info=True)
         raise
@@ -37,8 +40,10 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down application...")
     try:
+        await stop_services()
         await shutdown_bot()
         logger.info("Bot shutdown completed")
+        await close_db()
     except Exception as e:
         logger.error(f"Error during shutdown: {e}", exc_info=True)
 
@@ -1,5 +1,8 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Self
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Get the project root directory (two levels up from this file)
@@ -27,10 +30,77 @@ class Settings(BaseSettings):
     WEBHOOK_SECRET: str = ""
     WEBHOOK_PATH: str = "/webhook"  # /telegram/webhook
 
+    # Telegram HTTP Session Settings (per process)
+    TG_HTTP_TIMEOUT: float = 60.0  # Seconds a Bot API request may take
+    TG_HTTP_POOL_SIZE: int = 100  # Connections open to the Bot API at most
+    TG_HTTP_KEEPALIVE_TIMEOUT: float = 60.0  # Seconds an idle connection is kept for reuse
+    TG_HTTP_DNS_CACHE_TTL: int = 3600  # Seconds a resolved Bot API address is cached
+    TG_HTTP_WARM_CONNECTIONS: int = 2  # Connections opened at startup, 0 to connect lazily
+
+    # Telegram Rate Limit Settings (for the bot as a whole, split between workers)
+    TG_RATE_GLOBAL_PER_SECOND: float = 30.0
+    TG_RATE_GROUP_PER_MINUTE: float = 20.0
+    TG_RATE_PRIVATE_PER_SECOND: float = 1.0
+    TG_RATE_CHAT_BURST: float = 3.0  # Messages a chat may receive back to back
+    TG_RATE_CHAT_BUCKETS: int = 10000  # Chats tracked per worker
+    TG_SEND_MAX_RETRIES: int = 3  # Retries after a 429 with retry_after
+    TG_SEND_MAX_WAIT: float = 2.0  # Seconds a send in a webhook request waits before it is deferred to the outbox
+
+    # Telegram Notification Coalescing Settings
+    TG_COALESCE_ENABLED: bool = True  # Merge bursts of pushes to the same ref into one message
+    TG_COALESCE_WINDOW: float = 2.0  # Seconds a notification is held at idle
+    TG_COALESCE_MAX_WINDOW: float = 30.0  # Upper bound as the backlog grows
+    TG_COALESCE_BACKLOG_SCALE: float = 10.0  # Backlog at which the window doubles
+
+    # Telegram Edit-in-Place Settings
+    TG_EDIT_IN_PLACE: bool = True  # Edit a thread's recent message instead of sending a new one
+    TG_EDIT_WINDOW: int = 900  # Seconds after sending during which a message is still edited
+    TG_EDIT_INDEX_SIZE: int = 10000  # Threads remembered per worker, as a hint checked against the table
+
+    # Telegram Outbox Settings
+    TG_OUTBOX_ENABLED: bool = False  # Handlers write notifications to the outbox instead of sending them
+    TG_OUTBOX_BATCH_SIZE: int = 100  # Messages claimed at once; those of the same thread are merged
+    TG_OUTBOX_POLL_INTERVAL: float = 5.0  # Seconds between polls when no notification arrives
+    TG_OUTBOX_MAX_ATTEMPTS: int = 8
+    TG_OUTBOX_RETRY_DELAY: float = 5.0  # Base delay for exponential backoff, in seconds
+    TG_OUTBOX_MAX_RETRY_DELAY: float = 600.0  # Seconds
+    TG_OUTBOX_VISIBILITY_TIMEOUT: int = 300  # Seconds before a message stuck in sending is claimed again
+    TG_DEDICATED_SENDER: bool = False  # Outbox is sent by `manage.py runsender`, not by the workers
+    TG_SENDER_LEASE_TTL: float = 30.0  # Seconds before a standby sender takes over from a dead leader
+
     # GitHub Settings
     GH_WEBHOOK_SECRET: str = ""
+    GH_WEBHOOK_PREVIOUS_SECRETS: str = ""  # Comma-separated, still accepted during rotation
     GH_WEBHOOK_URL: str = ""
     GH_WEBHOOK_PATH: str = "/webhook"  # /github/webhook
+    GH_WEBHOOK_SINGLE_PASS: bool = True  # Validate payloads straight from raw bytes
+    GH_LEAN_EVENT_MODELS: bool = True  # Validate only the fields handlers read
+    GH_EXECUTOR_MAX_LANES: int = 32  # Repositories whose events are handled concurrently
+    GH_REPO_LOCK_ENABLED: bool = False  # Also order a repository's events across workers; caps the lanes
+    GH_REPO_LOCK_TIMEOUT: float = 30.0  # Seconds an event waits for the repository's events on other workers
+    GH_HANDLER_TIMEOUT: float = 30.0  # Default per-handler timeout, in seconds
+
+    # GitHub Delivery De-duplication Settings
+    GH_DEDUP_ENABLED: bool = True
+    GH_DEDUP_CACHE_SIZE: int = 10000  # Delivery IDs remembered per worker
+    GH_DEDUP_CACHE_TTL: int = 3600  # Seconds
+    GH_DEDUP_RETENTION: int = 604800  # Seconds a delivery ID is kept; GitHub redelivers for 3 days
+    GH_DEDUP_PRUNE_INTERVAL: float = 3600.0  # Seconds between pruning runs
+    GH_DEDUP_PRUNE_BATCH_SIZE: int = 5000  # Rows deleted per transaction
+
+    # GitHub Repository Routing Settings
+    GH_ROUTING_CACHE_SIZE: int = 10000  # Repositories remembered per worker
+    GH_ROUTING_CACHE_TTL: int = 600  # Seconds, bounds staleness if a notification is missed
+    GH_ROUTING_NEGATIVE_CACHE_SIZE: int = 50000  # Unconnected repositories remembered per worker
+    GH_ROUTING_NEGATIVE_CACHE_TTL: int = 600  # Seconds
+
+    # GitHub Delivery Queue Settings
+    GH_WEBHOOK_ASYNC: bool = False  # Acknowledge with 202 and process deliveries from the queue
+    GH_QUEUE_CONSUMERS: int = 2  # Consumers per worker
+    GH_QUEUE_POLL_INTERVAL: float = 1.0  # Seconds between polls when the queue is empty
+    GH_QUEUE_MAX_ATTEMPTS: int = 5
+    GH_QUEUE_RETRY_DELAY: float = 5.0  # Base delay for exponential backoff, in seconds
+    GH_QUEUE_VISIBILITY_TIMEOUT: int = 300  # Seconds before a stuck delivery is claimed again
 
     # FastAPI Server Settings
     HOST: str = "0.0.0.0"
@@ -39,6 +109,31 @@ class Settings(BaseSettings):
     # Database Settings
     DATABASE_URL: str = ""
     DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 5  # Per worker
+    DATABASE_MAX_OVERFLOW: int = 5  # Per worker
+    DATABASE_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection
+    DATABASE_MAX_CONNECTIONS: int = 0  # Postgres max_connections; when set, pools are sized per worker from it
+    DATABASE_RESERVED_CONNECTIONS: int = 10  # Left free for migrations, admin and other clients
+    DATABASE_PGBOUNCER_MODE: bool = False  # DATABASE_URL points at PgBouncer in transaction pooling mode
+    DATABASE_LISTEN_URL: str = ""  # Connection for LISTEN, defaults to DATABASE_URL; must bypass PgBouncer
+    DATABASE_LISTEN_HEALTHCHECK_INTERVAL: float = 30.0  # Seconds
+    DATABASE_LISTEN_RECONNECT_DELAY: float = 5.0  # Seconds
+
+    @model_validator(mode="after")
+    def check_dedicated_sender(self) -> Self:
+        """The workers stop sending the outbox for a dedicated sender, which only runs with the outbox enabled"""
+        if self.TG_DEDICATED_SENDER and not self.TG_OUTBOX_ENABLED:
+            raise ValueError("TG_DEDICATED_SENDER requires TG_OUTBOX_ENABLED, or deferred notifications are never sent")
+        return self
+
+    @property
+    def gh_webhook_secrets(self) -> list[str]:
+        """Active GitHub webhook secrets, the current one first."""
+        secrets = [self.GH_WEBHOOK_SECRET, *self.GH_WEBHOOK_PREVIOUS_SECRETS.split(",")]
+        return [secret.strip() for secret in secrets if secret.strip()]
 
 
 @lru_cache
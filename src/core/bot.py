@@ -1,20 +1,76 @@
-from aiogram import Bot, Dispatcher
+import asyncio
+import ssl
+
+import certifi
+from aiogram import Bot, Dispatcher, __version__ as aiogram_version
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
+from aiohttp import ClientSession, TCPConnector
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
 
 from handlers.bot import setup_bot_handlers
 from config import settings
 from core import get_logger
-from core.middlewares import DatabaseMiddleware
+from core.middlewares import DatabaseMiddleware, RequestMetricsMiddleware
 from core.decorators import distributed_lock
+from database import close_db
 
 logger = get_logger(__name__)
 
 dp = Dispatcher()
 dp.message.middleware(DatabaseMiddleware())
 
+
+class BotSession(AiohttpSession):
+    """
+    aiogram's aiohttp session with a connector tuned for the Bot API.
+
+    ``AiohttpSession`` takes no keep-alive or DNS cache settings, so the
+    connector is built here when the session opens its ``ClientSession``.
+    """
+
+    def __init__(self, limit: int, keepalive_timeout: float, dns_cache_ttl: int, **kwargs) -> None:
+        super().__init__(limit=limit, **kwargs)
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+    async def create_session(self) -> ClientSession:
+        if self._should_reset_connector:
+            await self.close()
+
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+                limit=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = ClientSession(
+                connector=connector, headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{aiogram_version}"}
+            )
+            self._should_reset_connector = False
+
+        return self._session
+
+
+def create_bot_session() -> BotSession:
+    """Build the bot's HTTP session from the ``TG_HTTP_*`` settings"""
+    session = BotSession(
+        limit=settings.TG_HTTP_POOL_SIZE,
+        keepalive_timeout=settings.TG_HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl=settings.TG_HTTP_DNS_CACHE_TTL,
+        timeout=settings.TG_HTTP_TIMEOUT,
+    )
+    session.middleware(RequestMetricsMiddleware(limit=settings.TG_HTTP_POOL_SIZE))
+    return session
+
+
 bot = Bot(
     token=settings.BOT_TOKEN,
+    session=create_bot_session(),
     default=DefaultBotProperties(
         parse_mode=ParseMode.HTML,
         link_preview_is_disabled=True,
@@ -22,15 +78,73 @@ bot = Bot(
 )
 
 
+def reset_bot_session() -> None:
+    """
+    Give the bot a fresh HTTP session in a forked worker.
+
+    A session opened by the parent is bound to its event loop and sockets; it is
+    dropped without closing, and the new one connects lazily on first request.
+    """
+    bot.session = create_bot_session()
+
+
+async def warm_bot_session() -> None:
+    """
+    Open connections to the Bot API before the first message needs one.
+
+    Concurrent ``getMe`` calls each take a connection of their own, which then
+    stays in the pool for reuse. That pays off when traffic follows soon after
+    startup, as after a worker recycle under load; in a quiet period the idle
+    connections are closed after ``TG_HTTP_KEEPALIVE_TIMEOUT``, and the first
+    send connects again. Failures are only logged; sends will connect themselves.
+    """
+    count = settings.TG_HTTP_WARM_CONNECTIONS
+    if count <= 0:
+        return
+
+    results = await asyncio.gather(*(bot.get_me() for _ in range(count)), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        logger.warning(f"Could not warm up the bot session: {errors[0]}")
+    else:
+        logger.info(f"Opened {count} connections to the Bot API")
+
+
+# Set once the gunicorn master has registered the webhook; forked workers inherit it
+_webhook_registered = False
+
+
+async def register_webhook() -> None:
+    """
+    Register the webhook once on behalf of all workers.
+
+    Called from the gunicorn master before it forks, so worker recycles and
+    restarts never touch the webhook. The connections it opened are closed
+    again, as they must not leak into the workers.
+    """
+    global _webhook_registered
+
+    try:
+        await _init_with_webhook()
+        _webhook_registered = True
+    except Exception as e:
+        logger.error(f"Failed to register webhook, workers will try themselves: {e}")
+    finally:
+        await bot.session.close()
+        await close_db()
+
+
 async def init_bot():
     """Initialize the bot"""
     logger.info("Initializing bot")
 
     setup_bot_handlers(dp)
+    await warm_bot_session()
 
     match settings.USE_WEBHOOK:
         case True:
-            await _init_with_webhook()
+            if not _webhook_registered:
+                await _init_with_webhook()
         case False:
             await _init_with_polling()
 
@@ -50,11 +164,10 @@ async def _init_with_webhook():
     except Exception as e:
         logger.warning(f"Could not get webhook info: {e}. Proceeding with setup.")
 
-    # Set the webhook
+    # Set the webhook, keeping updates queued while it was pointing elsewhere
     logger.info(f"Setting webhook to {webhook_url}...")
     await bot.set_webhook(
         url=webhook_url,
-        drop_pending_updates=True,
         secret_token=settings.WEBHOOK_SECRET,
     )
     logger.info("Webhook set successfully. Waiting for updates...")
@@ -73,11 +186,8 @@ async def shutdown_bot():
     """
     logger.info("Shutting down bot...")
 
-    try:
-        await bot.delete_webhook(drop_pending_updates=True)
-        logger.info("Webhook deleted")
-    except Exception as e:
-        logger.warning(f"Error deleting webhook: {e}")
+    # The webhook is left in place: Telegram queues updates while no worker is up.
+    # Use `manage.py delete_webhook` to take it down deliberately.
 
     try:
         await bot.session.close()
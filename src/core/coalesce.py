@@ -0,0 +1,152 @@
+import asyncio
+import time
+from functools import reduce
+from typing import Optional
+
+from config import settings
+from core import get_logger
+from core.outbox import notification_outbox
+from core.ratelimit import RateLimitExceeded
+from core.utils.bot import Notification, send_notification
+from core.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# How long after the longest window a held notification is left to this worker before the outbox sends it
+HOLD_GRACE = 30.0
+
+
+class NotificationCoalescer:
+    """
+    Buffers mergeable notifications per chat and thread key, sending one merged message per window.
+
+    The window grows with the backlog: when many notifications are buffered or
+    waiting on the rate limiter, threads are held longer and more of them are
+    merged, and at idle it shrinks back to the base window.
+
+    Each buffered notification is also held in the outbox, where it only becomes
+    available to senders once the longest window has passed, so a push is not lost
+    when the worker dies with it buffered. When the window closes the held rows are
+    claimed, and only those no sender got to first are merged and sent. A message
+    that fails to send, or would wait for the rate limit, is released to the
+    outbox. ``flush`` empties the buffer on shutdown.
+    """
+
+    def __init__(self, window: float, max_window: float, backlog_scale: float) -> None:
+        self.window = window
+        self.max_window = max_window
+        self.backlog_scale = backlog_scale
+
+        # Held notifications with their outbox IDs, None for one that could not be held
+        self._pending: dict[tuple[int, str], list[tuple[Optional[int], Notification]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._flushing = asyncio.Event()
+
+        self._buffered = metrics.gauge("coalescer_buffered")
+        self._merged = metrics.counter("coalescer_merged_total")
+        self._sent = metrics.counter("coalescer_sent_total")
+        self._deferred = metrics.counter("coalescer_deferred_total")
+        self._dropped = metrics.counter("coalescer_dropped_total")
+
+    def backlog(self) -> float:
+        """Notifications buffered here or waiting to be sent"""
+        return len(self._pending) + metrics.gauge("telegram_send_waiting").value
+
+    def current_window(self) -> float:
+        return min(self.max_window, self.window * (1 + self.backlog() / self.backlog_scale))
+
+    async def submit(self, notification: Notification) -> None:
+        """Hold a notification in the outbox and buffer it with the pending ones for the same thread"""
+        key = (notification.chat_id, notification.thread_key)
+
+        try:
+            message_id = await notification_outbox.hold(notification, delay=self.max_window + HOLD_GRACE)
+        except Exception as e:
+            logger.error("Failed to hold notification for %s in the outbox, buffering it in memory: %s", key[1], e)
+            message_id = None
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append((message_id, notification))
+            self._merged.inc()
+            return
+
+        self._pending[key] = [(message_id, notification)]
+        self._buffered.set(len(self._pending))
+
+        task = asyncio.create_task(self._flush_later(key, time.monotonic()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, key: tuple[int, str], started: float) -> None:
+        # The window is re-evaluated as the backlog changes while the thread is held
+        while not self._flushing.is_set() and (remaining := started + self.current_window() - time.monotonic()) > 0:
+            try:
+                await asyncio.wait_for(self._flushing.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        await self._send(key)
+
+    async def _send(self, key: tuple[int, str]) -> None:
+        pending = self._pending.pop(key, None)
+        self._buffered.set(len(self._pending))
+        if not pending:
+            return
+
+        held = [message_id for message_id, _ in pending if message_id is not None]
+        try:
+            claimed = set(await notification_outbox.claim_held(held)) if held else set()
+        except Exception as e:
+            logger.error("Failed to claim notifications for %s, leaving them to the outbox: %s", key[1], e)
+            claimed = set()
+
+        # Notifications that are not claimed are being sent by the outbox already
+        notifications = [n for message_id, n in pending if message_id is None or message_id in claimed]
+        if not notifications:
+            return
+        notification = reduce(Notification.merge, notifications)
+        ids = list(claimed)
+
+        try:
+            await send_notification(notification, max_wait=settings.TG_SEND_MAX_WAIT)
+            self._sent.inc()
+        except RateLimitExceeded as e:
+            logger.info("Deferring notification for %s to the outbox: %s", key[1], e)
+        except Exception as e:
+            logger.error("Failed to send notification for %s to chat %s, deferring it: %s", key[1], key[0], e)
+        else:
+            if ids:
+                try:
+                    await notification_outbox.delete(ids)
+                except Exception as e:
+                    # Marked as being sent, the rows are dead-lettered by the outbox rather than sent again
+                    logger.error("Failed to remove sent notifications for %s from the outbox: %s", key[1], e)
+            return
+
+        try:
+            if len(ids) == len(notifications):
+                await notification_outbox.release(ids)
+            else:
+                await notification_outbox.defer(notification)
+                if ids:
+                    await notification_outbox.delete(ids)
+            self._deferred.inc()
+        except Exception as e:
+            logger.error("Dropped notification for %s to chat %s: %s", key[1], key[0], e)
+            self._dropped.inc()
+
+    async def flush(self) -> None:
+        """Send every buffered notification now, e.g. on shutdown"""
+        self._flushing.set()
+        try:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            self._flushing.clear()
+
+
+coalescer = NotificationCoalescer(
+    window=settings.TG_COALESCE_WINDOW,
+    max_window=settings.TG_COALESCE_MAX_WINDOW,
+    backlog_scale=settings.TG_COALESCE_BACKLOG_SCALE,
+)
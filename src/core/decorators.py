@@ -1,13 +1,18 @@
-from functools import wraps
+from functools import wraps, partial
 from typing import Callable, TYPE_CHECKING, Optional
+import asyncio
 import inspect
+import time
 
-from sqlalchemy import text
-
+from config import settings
 from core import get_logger
 from core.enums import GHEventType
-from database import async_session_maker
+from core.locks import advisory_lock, lease, lock_key
+from core.outbox import notification_outbox
+from database import lazy_session
+from core.utils.bot import Notification, deliver
 from core.utils.command_validator import BaseCommandValidator
+from core.utils.metrics import metrics
 
 if TYPE_CHECKING:
     from handlers.github.events.base import EventHandler
@@ -16,12 +21,19 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 
 
-def distributed_lock(lock_name: str):
+def distributed_lock(lock_name: str, timeout: Optional[float] = None):
     """
     Decorator to ensure only one worker executes the function at a time using PostgreSQL advisory locks.
 
+    The lock is transaction-scoped: it is held by a transaction left open while the
+    function runs and released when that transaction ends, even if the connection
+    is lost. Unlike session-level locks, this also works behind PgBouncer in
+    transaction pooling mode. The lock ID is derived from the name with a stable
+    digest, so every process agrees on it.
+
     Args:
-        lock_name: A unique string identifier for the lock (will be hashed to an integer)
+        lock_name: A unique string identifier for the lock
+        timeout: Seconds to wait for the lock; by default skip at once if another worker holds it
 
     Usage:
         @distributed_lock("webhook_init")
@@ -29,33 +41,48 @@ def distributed_lock(lock_name: str):
             # Only one worker will execute this at a time
             ...
     """
-    # Generate a consistent 32-bit integer lock ID from the lock name
-    lock_id = hash(lock_name) % (2**31)
 
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            async with async_session_maker() as session:
-                lock_acquired = False
-                try:
-                    # Try to acquire advisory lock (non-blocking)
-                    result = await session.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": lock_id})
-                    lock_acquired = result.scalar()
-
-                    if lock_acquired:
-                        logger.info(f"Acquired distributed lock '{lock_name}' (ID: {lock_id})")
-                        # Execute the function
-                        return await func(*args, **kwargs)
-                    else:
-                        # Another worker is handling this task
-                        logger.info(f"Lock '{lock_name}' already held by another worker. Skipping execution.")
-                        return None
+            async with advisory_lock(lock_name, timeout=timeout) as acquired:
+                if not acquired:
+                    # Another worker is handling this task
+                    logger.info(f"Lock '{lock_name}' already held by another worker. Skipping execution.")
+                    return None
+
+                logger.info(f"Acquired distributed lock '{lock_name}' (ID: {lock_key(lock_name)})")
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def lease_lock(lock_name: str, ttl: float = 60.0, timeout: Optional[float] = None):
+    """
+    Decorator to run the function in at most one process at a time under an expiring lease.
 
-                finally:
-                    # Release the advisory lock if we acquired it
-                    if lock_acquired:
-                        await session.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": lock_id})
-                        logger.debug(f"Released distributed lock '{lock_name}' (ID: {lock_id})")
+    Unlike ``distributed_lock`` no connection is held while the function runs; the
+    lease is renewed in the background and expires after ``ttl`` seconds if its
+    holder dies, so it suits long-running singleton jobs.
+
+    Args:
+        lock_name: A unique string identifier for the lease
+        ttl: Seconds the lease stays valid without renewal
+        timeout: Seconds to keep retrying; by default skip at once if the lease is held
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with lease(lock_name, ttl=ttl, timeout=timeout) as acquired:
+                if not acquired:
+                    logger.info(f"Lease '{lock_name}' held by another process. Skipping execution.")
+                    return None
+
+                logger.info(f"Acquired lease '{lock_name}'")
+                return await func(*args, **kwargs)
 
         return wrapper
 
@@ -107,9 +134,10 @@ def parse_command(arguments: list, validator: BaseCommandValidator):
 
 
 class GitHubEventRegistry:
-    """Registry for GitHub event handlers"""
+    """Registry for GitHub event handlers, several per event"""
 
     _registry = {}
+    _background_tasks: set[asyncio.Task] = set()
 
     @classmethod
     def _extract_event_model(cls, handler: Callable) -> type["BaseEvent"]:
@@ -126,40 +154,233 @@ class GitHubEventRegistry:
         return event_param.annotation
 
     @classmethod
-    def register(cls, event: GHEventType) -> Callable:
+    def register(
+        cls,
+        event: GHEventType,
+        lean_model: Optional[type["BaseEvent"]] = None,
+        timeout: Optional[float] = None,
+        background: bool = False,
+    ) -> Callable:
+        """
+        Register a handler for a GitHub event.
+
+        Several handlers can be registered for the same event; they all receive the
+        same validated event and run concurrently.
+
+        Handlers do their database work with the injected session and return a
+        ``Notification`` instead of sending it themselves; it is delivered after the
+        session has been released, or written to the outbox with
+        ``TG_OUTBOX_ENABLED``.
+
+        Args:
+            event: The event type the handler is called for
+            lean_model: Optional projection of the handler's event model, declaring only
+                the fields the handler reads. Used instead of the full model when
+                ``GH_LEAN_EVENT_MODELS`` is enabled.
+            timeout: Seconds the handler may run before it is cancelled
+                (defaults to ``GH_HANDLER_TIMEOUT``)
+            background: Run the handler outside the delivery, e.g. for archival. It
+                neither holds up the repository's other events nor fails the
+                delivery; its errors are only logged and counted.
+        """
 
         def decorator(handler) -> Callable:
 
             model = cls._extract_event_model(handler)
+            name = f"{handler.__module__}.{handler.__name__}"
+
+            entry = cls._registry.setdefault(event, {"model": model, "lean_model": None, "handlers": []})
+            if entry["model"] is not model:
+                raise ValueError(
+                    f"Handler {name} must accept {entry['model'].__name__} like the other {event.value} handlers"
+                )
+            if lean_model and entry["lean_model"] not in (None, lean_model):
+                raise ValueError(f"A different lean model is already registered for {event.value} events")
+            entry["lean_model"] = entry["lean_model"] or lean_model
+
+            async def resolve(*args, **kwargs) -> Optional[Notification]:
+                """Resolve phase: run the handler, returning the notification left to deliver"""
+                # Provide a database session that is only opened if the handler uses it
+                async with lazy_session() as session:
+                    kwargs["session"] = session
+                    result = await handler(*args, **kwargs)
+
+                    # With the outbox, the notification commits together with the handler's work
+                    if isinstance(result, Notification) and settings.TG_OUTBOX_ENABLED:
+                        await notification_outbox.put(session, result)
+                        return None
+
+                return result if isinstance(result, Notification) else None
 
             @wraps(handler)
-            async def wrapper(*args, **kwargs) -> None:
+            async def wrapper(*args, **kwargs) -> Optional[Notification]:
 
-                # Create a new database session for each event handling
-                async with async_session_maker() as session:
-                    kwargs["session"] = session
-                    try:
-                        result = await handler(*args, **kwargs)
-                        await session.commit()
-                        return result
-                    except Exception as e:
-                        logger.error("Error handling GitHub event: %s", e)
-                        await session.rollback()
-                        raise
-
-            cls._registry[event] = {
-                "handler": wrapper,
-                "model": model,
-            }
+                try:
+                    notification = await resolve(*args, **kwargs)
+
+                    # Deliver phase: the session is committed and its connection returned to the pool
+                    if notification is not None:
+                        await deliver(notification)
+                    return notification
+                except Exception as e:
+                    logger.error("Error handling GitHub event: %s", e)
+                    raise
+
+            entry["handlers"].append(
+                {
+                    "name": name,
+                    "resolve": resolve,
+                    "timeout": timeout or settings.GH_HANDLER_TIMEOUT,
+                    "background": background,
+                }
+            )
 
             return wrapper
 
         return decorator
 
+    @classmethod
+    def is_handled(cls, event: str) -> bool:
+        """Check whether a raw ``X-GitHub-Event`` value has a registered handler"""
+        try:
+            return GHEventType(event) in cls._registry
+        except ValueError:
+            return False
+
     @classmethod
     def get_handler(cls, event: GHEventType) -> Optional["EventHandler"]:
-        return cls._registry.get(event, {}).get("handler")
+        """Get a handler that dispatches the event through its repository's lane"""
+        if event not in cls._registry:
+            return None
+        return partial(cls.dispatch, event)
+
+    @classmethod
+    async def dispatch(cls, event_type: GHEventType, event: "BaseEvent") -> None:
+        """
+        Run every handler registered for an event.
+
+        Events of the same repository are handled one at a time in arrival order,
+        while events of different repositories are handled in parallel. Within a
+        worker the order is kept by the executor's lanes. With
+        ``GH_REPO_LOCK_ENABLED``, an advisory lock on the repository also orders
+        the handlers' resolve phases across workers; it is released before the
+        notifications are delivered, so no connection is held during the
+        Telegram round-trips, and notifications of events handled on different
+        workers may arrive out of order.
+
+        Background handlers are started right away and are not waited for.
+
+        Raises:
+            ExceptionGroup: If any other handler failed or timed out, once all of them finished
+            TimeoutError: If the repository's events on other workers took longer than
+                ``GH_REPO_LOCK_TIMEOUT``
+        """
+        from core.executor import event_executor
+
+        cls._start_background(event_type, event)
+
+        repository = getattr(event, "repository", None)
+        if repository is None:
+            return await cls._fan_out(event_type, event)
+
+        return await event_executor.submit(
+            repository.full_name, lambda: cls._fan_out(event_type, event, repository.full_name)
+        )
+
+    @classmethod
+    def _start_background(cls, event_type: GHEventType, event: "BaseEvent") -> None:
+        for spec in cls._registry[event_type]["handlers"]:
+            if spec["background"]:
+                task = asyncio.create_task(cls._run_background(spec, event), name=f"background-{spec['name']}")
+                cls._background_tasks.add(task)
+                task.add_done_callback(cls._background_tasks.discard)
+
+    @classmethod
+    async def wait_background(cls) -> None:
+        """Wait for background handlers still running, e.g. before shutting down"""
+        await asyncio.gather(*cls._background_tasks, return_exceptions=True)
+
+    @classmethod
+    async def _fan_out(cls, event_type: GHEventType, event: "BaseEvent", repository: Optional[str] = None) -> None:
+        handlers = [spec for spec in cls._registry[event_type]["handlers"] if not spec["background"]]
+        if not handlers:
+            return
+
+        if repository is not None and settings.GH_REPO_LOCK_ENABLED:
+            results = await cls._resolve_locked(repository, handlers, event)
+        else:
+            results = await cls._resolve(handlers, event)
+
+        delivered = await asyncio.gather(
+            *(cls._deliver(spec, notification) for spec, (notification, _) in zip(handlers, results))
+        )
+
+        errors = [error or failure for (_, error), failure in zip(results, delivered) if error or failure]
+        if errors:
+            raise ExceptionGroup(f"{len(errors)} of {len(handlers)} {event_type.value} handlers failed", errors)
+
+    @classmethod
+    async def _resolve(
+        cls, handlers: list[dict], event: "BaseEvent"
+    ) -> list[tuple[Optional[Notification], Optional[Exception]]]:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(cls._run_handler(spec, event)) for spec in handlers]
+        return [task.result() for task in tasks]
+
+    @classmethod
+    async def _resolve_locked(
+        cls, repository: str, handlers: list[dict], event: "BaseEvent"
+    ) -> list[tuple[Optional[Notification], Optional[Exception]]]:
+        # Postgres grants waiters in the order they asked, so workers take turns in arrival order
+        async with advisory_lock(f"gh_repo:{repository}", timeout=settings.GH_REPO_LOCK_TIMEOUT) as acquired:
+            if not acquired:
+                raise TimeoutError(f"Timed out waiting for other workers to handle events of {repository}")
+            return await cls._resolve(handlers, event)
+
+    @classmethod
+    async def _run_background(cls, spec: dict, event: "BaseEvent") -> None:
+        notification, error = await cls._run_handler(spec, event)
+        if error is None:
+            await cls._deliver(spec, notification)
+
+    @classmethod
+    async def _run_handler(cls, spec: dict, event: "BaseEvent") -> tuple[Optional[Notification], Optional[Exception]]:
+        """Run a single handler's resolve phase in isolation, returning its error instead of raising it"""
+        started_at = time.monotonic()
+        try:
+            async with asyncio.timeout(spec["timeout"]):
+                return await spec["resolve"](event=event), None
+        except TimeoutError as e:
+            logger.error("Handler %s timed out after %ss", spec["name"], spec["timeout"])
+            metrics.counter("github_handler_errors_total", handler=spec["name"], reason="timeout").inc()
+            return None, e
+        except Exception as e:
+            logger.error("Handler %s failed: %s", spec["name"], e)
+            metrics.counter("github_handler_errors_total", handler=spec["name"], reason="error").inc()
+            return None, e
+        finally:
+            metrics.histogram("github_handler_seconds", handler=spec["name"]).observe(time.monotonic() - started_at)
+
+    @staticmethod
+    async def _deliver(spec: dict, notification: Optional[Notification]) -> Optional[Exception]:
+        """Deliver a handler's notification, returning the error instead of raising it"""
+        if notification is None:
+            return None
+        try:
+            await deliver(notification)
+            return None
+        except Exception as e:
+            logger.error("Delivering the notification of handler %s failed: %s", spec["name"], e)
+            metrics.counter("github_handler_errors_total", handler=spec["name"], reason="delivery").inc()
+            return e
 
     @classmethod
-    def get_event_model(cls, event: GHEventType) -> Optional["BaseEvent"]:
-        return cls._registry.get(event, {}).get("model")
+    def get_event_model(cls, event: GHEventType, lean: Optional[bool] = None) -> Optional[type["BaseEvent"]]:
+        """Get the model payloads of the event are validated with, preferring the lean one if enabled"""
+        entry = cls._registry.get(event, {})
+        if lean is None:
+            lean = settings.GH_LEAN_EVENT_MODELS
+
+        if lean and entry.get("lean_model"):
+            return entry["lean_model"]
+        return entry.get("model")
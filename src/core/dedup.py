@@ -0,0 +1,146 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from core import get_logger
+from core.utils.cache import TTLCache
+from core.utils.metrics import metrics
+from database import async_session_maker
+from database.models import SeenDelivery
+
+logger = get_logger(__name__)
+
+
+class DeliveryDeduplicator:
+    """
+    Two-tier idempotency guard keyed on ``X-GitHub-Delivery``.
+
+    A bounded in-process TTL cache answers for deliveries this worker has already
+    seen; the ``gh_seen_deliveries`` table, with its unique constraint, settles
+    redeliveries that land on a different worker. Rows older than the retention
+    period are pruned, as GitHub only redelivers recent deliveries.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._pruner: asyncio.Task | None = None
+        self._pruned = metrics.counter("dedup_pruned_total")
+        self._memory_hits = metrics.counter("dedup_hits_total", tier="memory")
+        self._db_hits = metrics.counter("dedup_hits_total", tier="db")
+        self._misses = metrics.counter("dedup_misses_total")
+
+    def seen(self, delivery_id: str) -> bool:
+        """Cheap check against the local cache, done before the body is read"""
+        if delivery_id in self._cache:
+            self._memory_hits.inc()
+            return True
+        return False
+
+    async def claim(self, delivery_id: str) -> bool:
+        """
+        Claim a delivery for processing.
+
+        :return: False if another request, on any worker, already claimed it
+        """
+        if self.seen(delivery_id):
+            return False
+
+        # Mark it locally first so concurrent requests in this worker stop here
+        self._cache.set(delivery_id)
+
+        try:
+            async with async_session_maker() as session:
+                claimed = await session.scalar(
+                    insert(SeenDelivery)
+                    .values(id=uuid.uuid4(), delivery_id=delivery_id)
+                    .on_conflict_do_nothing(index_elements=[SeenDelivery.delivery_id])
+                    .returning(SeenDelivery.id)
+                )
+                await session.commit()
+        except Exception:
+            self._cache.pop(delivery_id)
+            raise
+
+        if claimed is None:
+            self._db_hits.inc()
+            return False
+
+        self._misses.inc()
+        return True
+
+    async def release(self, delivery_id: str) -> None:
+        """Forget a delivery whose processing failed so that a redelivery is handled"""
+        self._cache.pop(delivery_id)
+
+        try:
+            async with async_session_maker() as session:
+                await session.execute(delete(SeenDelivery).where(SeenDelivery.delivery_id == delivery_id))
+                await session.commit()
+        except Exception as e:
+            logger.error("Failed to release delivery %s: %s", delivery_id, e)
+
+    def start(self) -> None:
+        """Start pruning expired delivery IDs in the background"""
+        if self._pruner is None:
+            self._pruner = asyncio.create_task(self._prune_periodically(), name="dedup-pruner")
+
+    async def stop(self) -> None:
+        """Stop the pruning task"""
+        if self._pruner is None:
+            return
+
+        self._pruner.cancel()
+        await asyncio.gather(self._pruner, return_exceptions=True)
+        self._pruner = None
+
+    async def _prune_periodically(self) -> None:
+        from core.locks import advisory_lock
+
+        while True:
+            try:
+                # One worker prunes per interval, the others skip
+                async with advisory_lock("gh_dedup_prune") as acquired:
+                    if acquired:
+                        await self.prune()
+            except Exception as e:
+                logger.error("Failed to prune seen deliveries: %s", e)
+
+            await asyncio.sleep(settings.GH_DEDUP_PRUNE_INTERVAL)
+
+    async def prune(self) -> int:
+        """
+        Delete delivery IDs older than the retention period.
+
+        Rows go in batches, each in its own short transaction, so pruning a large
+        backlog never holds locks on the table for long.
+
+        :return: Number of rows deleted
+        """
+        cutoff = func.now() - timedelta(seconds=settings.GH_DEDUP_RETENTION)
+        total = 0
+
+        while True:
+            async with async_session_maker() as session:
+                batch = (
+                    select(SeenDelivery.id)
+                    .where(SeenDelivery.created_at < cutoff)
+                    .limit(settings.GH_DEDUP_PRUNE_BATCH_SIZE)
+                )
+                result = await session.execute(delete(SeenDelivery).where(SeenDelivery.id.in_(batch)))
+                await session.commit()
+
+            total += result.rowcount
+            self._pruned.inc(result.rowcount)
+            if result.rowcount < settings.GH_DEDUP_PRUNE_BATCH_SIZE:
+                break
+
+        if total:
+            logger.info("Pruned %d seen deliveries", total)
+        return total
+
+
+deduplicator = DeliveryDeduplicator(maxsize=settings.GH_DEDUP_CACHE_SIZE, ttl=settings.GH_DEDUP_CACHE_TTL)
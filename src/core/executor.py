@@ -0,0 +1,116 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+from config import settings
+from core.utils.metrics import metrics
+from database.config import pool_limits
+
+T = TypeVar("T")
+
+
+class LaneExecutor:
+    """
+    Executor that runs jobs in ordered lanes.
+
+    Jobs sharing a key run one after another in submission order, while jobs with
+    different keys run in parallel, with at most ``max_active_lanes`` lanes
+    draining at the same time. Lanes exist only while they have work, and so do
+    their metric series.
+
+    Ordering holds within this process only; jobs that must also be ordered
+    against other workers take a lock of their own.
+    """
+
+    def __init__(self, name: str, max_active_lanes: int) -> None:
+        self.name = name
+        self._lanes: dict[Hashable, deque] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_active_lanes)
+        self._active_lanes = metrics.gauge("executor_active_lanes", executor=name)
+        self._wait = metrics.histogram("executor_lane_wait_seconds", executor=name)
+
+    def configure(self, max_active_lanes: int) -> None:
+        """Change how many lanes may drain at once, before any job is submitted"""
+        self._slots = asyncio.Semaphore(max_active_lanes)
+
+    async def submit(self, key: Hashable, job: Callable[[], Awaitable[T]]) -> T:
+        """Run ``job`` in the lane for ``key`` and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            task = asyncio.create_task(self._drain(key, lane), name=f"{self.name}-lane-{key}")
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        lane.append((job, future, time.monotonic()))
+        self._backlog(key).set(len(lane))
+
+        return await future
+
+    def backlog(self) -> dict[Hashable, int]:
+        """Number of jobs waiting in every lane"""
+        return {key: len(lane) for key, lane in self._lanes.items()}
+
+    def _backlog(self, key: Hashable):
+        return metrics.gauge("executor_lane_backlog", executor=self.name, lane=key)
+
+    async def _drain(self, key: Hashable, lane: deque) -> None:
+        try:
+            async with self._slots:
+                self._active_lanes.inc()
+                try:
+                    while lane:
+                        job, future, queued_at = lane.popleft()
+                        self._backlog(key).set(len(lane))
+                        self._wait.observe(time.monotonic() - queued_at)
+
+                        # The submitter went away before its turn came
+                        if future.cancelled():
+                            continue
+
+                        await self._run(job, future)
+                finally:
+                    self._active_lanes.dec()
+        finally:
+            # If the lane was cancelled, nobody is left to run the jobs still queued
+            for _, future, _ in lane:
+                future.cancel()
+            del self._lanes[key]
+            metrics.remove("executor_lane_backlog", executor=self.name, lane=key)
+
+    @staticmethod
+    async def _run(job: Callable[[], Awaitable[Any]], future: asyncio.Future) -> None:
+        try:
+            result = await job()
+        except Exception as e:
+            if not future.cancelled():
+                future.set_exception(e)
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            if not future.cancelled():
+                future.set_result(result)
+
+
+def event_lanes(workers: Optional[int] = None) -> int:
+    """
+    Repositories whose events a worker handles at once.
+
+    With ``GH_REPO_LOCK_ENABLED`` a lane resolving an event holds one connection
+    for the repository lock and another for its handler's session, so the lanes
+    are capped to leave at least one connection of the worker's pool free.
+    """
+    if not settings.GH_REPO_LOCK_ENABLED:
+        return settings.GH_EXECUTOR_MAX_LANES
+
+    pool_size, max_overflow = pool_limits(workers)
+    return max(1, min(settings.GH_EXECUTOR_MAX_LANES, (pool_size + max_overflow - 1) // 2))
+
+
+# Orders GitHub events per repository
+event_executor = LaneExecutor(name="github_events", max_active_lanes=event_lanes())
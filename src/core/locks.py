@@ -0,0 +1,187 @@
+"""
+Distributed locks shared by all worker processes.
+
+Advisory locks are transaction-scoped and vanish with the connection, which
+suits short singleton jobs such as startup tasks. Leases live in the ``leases``
+table and expire on their own, so a job that outlives its connection, or a
+process that dies without releasing, never blocks the others for longer than
+the lease's TTL.
+"""
+
+import asyncio
+import hashlib
+import os
+import socket
+import time
+from contextlib import asynccontextmanager, suppress
+from datetime import timedelta
+from typing import AsyncIterator, Optional
+from uuid import uuid4
+
+from sqlalchemy import delete, func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+
+from core import get_logger
+from core.utils.metrics import metrics
+from database import async_session_maker
+from database.models import Lease
+
+logger = get_logger(__name__)
+
+# Identifies this process as a lease holder
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+# SQLSTATE raised when lock_timeout expires
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+class LeaseLostError(Exception):
+    """Raised in a job whose lease was taken over by another holder"""
+
+
+def lock_key(name: str) -> int:
+    """Stable 64-bit advisory lock ID for a lock name, identical in every process"""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _record(name: str, started: float, acquired: bool) -> None:
+    waited = time.perf_counter() - started
+    metrics.histogram("lock_wait_seconds", lock=name).observe(waited)
+    metrics.counter("lock_attempts_total", lock=name, result="acquired" if acquired else "busy").inc()
+    logger.debug("Lock '%s' %s after %.3fs", name, "acquired" if acquired else "busy", waited)
+
+
+@asynccontextmanager
+async def advisory_lock(name: str, timeout: Optional[float] = None) -> AsyncIterator[bool]:
+    """
+    Hold a transaction-scoped advisory lock for the duration of the block.
+
+    :param name: Lock name, hashed with ``lock_key``
+    :param timeout: Seconds to wait for the lock; by default give up at once if it is held
+    :return: Whether the lock was acquired
+    """
+    lock_id = lock_key(name)
+    started = time.perf_counter()
+
+    async with async_session_maker() as session, session.begin():
+        if timeout is None:
+            acquired = await session.scalar(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": lock_id})
+        else:
+            acquired = True
+            try:
+                # A savepoint keeps the transaction usable if the wait times out
+                async with session.begin_nested():
+                    await session.execute(text(f"SET LOCAL lock_timeout = {max(1, int(timeout * 1000))}"))
+                    await session.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": lock_id})
+            except DBAPIError as e:
+                if getattr(e.orig, "sqlstate", None) != _LOCK_NOT_AVAILABLE:
+                    raise
+                acquired = False
+
+        _record(name, started, acquired)
+        yield acquired
+
+
+async def _acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    # Expiry is set and compared on the database's clock, the one every holder shares
+    expires_at = func.now() + timedelta(seconds=ttl)
+    stmt = insert(Lease).values(name=name, holder=holder, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.name],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at, "updated_at": func.now()},
+        # Only take over a lease that expired or that we already hold
+        where=(Lease.expires_at < func.now()) | (Lease.holder == holder),
+    ).returning(Lease.id)
+
+    async with async_session_maker() as session:
+        lease_id = await session.scalar(stmt)
+        await session.commit()
+    return lease_id is not None
+
+
+async def _renew_lease(name: str, holder: str, ttl: float) -> bool:
+    async with async_session_maker() as session:
+        result = await session.execute(
+            update(Lease)
+            .where(Lease.name == name, Lease.holder == holder)
+            .values(expires_at=func.now() + timedelta(seconds=ttl), updated_at=func.now())
+        )
+        await session.commit()
+    return result.rowcount == 1
+
+
+async def _release_lease(name: str, holder: str) -> None:
+    async with async_session_maker() as session:
+        await session.execute(delete(Lease).where(Lease.name == name, Lease.holder == holder))
+        await session.commit()
+
+
+@asynccontextmanager
+async def lease(
+    name: str,
+    ttl: float = 60.0,
+    timeout: Optional[float] = None,
+    holder: str = HOLDER,
+) -> AsyncIterator[bool]:
+    """
+    Hold a lease for the duration of the block, renewing it in the background.
+
+    If a renewal finds the lease taken over, the block is cancelled and
+    ``LeaseLostError`` raised in its place.
+
+    :param name: Lease name
+    :param ttl: Seconds the lease stays valid without renewal
+    :param timeout: Seconds to keep retrying while the lease is held elsewhere
+    :param holder: Holder identity, this process by default
+    :return: Whether the lease was acquired
+    """
+    started = time.perf_counter()
+    deadline = started + (timeout or 0)
+    interval = min(1.0, ttl / 3)
+
+    acquired = await _acquire_lease(name, holder, ttl)
+    while not acquired and time.perf_counter() + interval <= deadline:
+        await asyncio.sleep(interval)
+        acquired = await _acquire_lease(name, holder, ttl)
+
+    _record(name, started, acquired)
+    if not acquired:
+        yield False
+        return
+
+    task = asyncio.current_task()
+    lost = False
+
+    async def renew() -> None:
+        nonlocal lost
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                renewed = await _renew_lease(name, holder, ttl)
+            except Exception as e:
+                # The lease is still valid for a while, try again on the next tick
+                logger.warning("Failed to renew lease '%s': %s", name, e)
+                continue
+
+            if not renewed:
+                logger.error("Lease '%s' was taken over by another holder", name)
+                lost = True
+                task.cancel()
+                return
+
+    renewer = asyncio.create_task(renew(), name=f"lease-renewer-{name}")
+    try:
+        yield True
+    except asyncio.CancelledError:
+        if lost:
+            task.uncancel()
+            raise LeaseLostError(f"Lease '{name}' was lost") from None
+        raise
+    finally:
+        renewer.cancel()
+        with suppress(asyncio.CancelledError):
+            await renewer
+        if not lost:
+            await _release_lease(name, holder)
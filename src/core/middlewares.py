@@ -1,15 +1,21 @@
+import time
 from typing import Any, Awaitable, Callable, Dict
 
-from aiogram import BaseMiddleware
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
 from aiogram.types import TelegramObject
 
-from database import async_session_maker
+from core.utils.metrics import metrics
+from database import lazy_session
 
 
 class DatabaseMiddleware(BaseMiddleware):
     """
     Middleware that injects database session into handler context.
-    The session is automatically committed on success or rolled back on error.
+    The session is only opened if the handler uses it, and is automatically
+    committed on success or rolled back on error.
     """
 
     async def __call__(
@@ -29,12 +35,40 @@ class DatabaseMiddleware(BaseMiddleware):
         Returns:
             The result of the handler
         """
-        async with async_session_maker() as session:
+        async with lazy_session() as session:
             data["session"] = session
-            try:
-                result = await handler(event, data)
-                await session.commit()
-                return result
-            except Exception:
-                await session.rollback()
-                raise
+            return await handler(event, data)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Request middleware that accounts for the bot's HTTP connection pool.
+
+    Every Bot API request holds one of the session's ``limit`` connections while
+    it is in flight, or waits for one, so requests in flight relative to the
+    limit give the pool's utilisation; above 1, requests queue for a connection.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._in_flight = metrics.gauge("telegram_http_requests_in_flight")
+        metrics.gauge("telegram_http_pool_utilization").set_function(self.utilization)
+
+    def utilization(self) -> float:
+        return self._in_flight.value / self.limit
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        started = time.perf_counter()
+        self._in_flight.inc()
+        try:
+            return await make_request(bot, method)
+        finally:
+            self._in_flight.dec()
+            metrics.histogram("telegram_http_request_seconds", method=type(method).__name__).observe(
+                time.perf_counter() - started
+            )
@@ -0,0 +1,358 @@
+import asyncio
+import random
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import select, or_, and_, delete, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core import get_logger
+from core.utils.bot import Digest, Notification, send_notification
+from core.utils.metrics import metrics
+from database import async_session_maker
+from database.enums import DeliveryStatus
+from database.listener import notify
+from database.models import OutboxMessage
+
+logger = get_logger(__name__)
+
+# Channel notified whenever a message is written to the outbox
+OUTBOX_CHANNEL = "tg_outbox"
+
+
+class NotificationOutbox:
+    """
+    Postgres-backed outbox of rendered Telegram notifications.
+
+    Handlers write their notification in the same transaction as the rest of
+    their work, so handling a delivery never waits for Telegram. Notifications
+    that could not be sent right away, e.g. because of the rate limit, are
+    deferred here as well. A sender loop
+    claims ready messages with ``FOR UPDATE SKIP LOCKED``, merges those of the
+    same thread and sends them. Failed sends are retried with exponential
+    backoff and jitter; after the last attempt a message is kept with
+    ``FAILED`` status as a dead letter.
+
+    While a batch is in flight its claim is renewed, so a batch slowed down by
+    the rate limit is not claimed again by another sender. Each message is also
+    marked with ``sent_at`` before it goes to Telegram, which only one sender
+    can do, so a message is never sent twice. A message whose sender died after
+    marking it may or may not have been sent; it becomes a dead letter rather
+    than risking a duplicate.
+    """
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+        self._sent = metrics.counter("outbox_sent_total")
+        self._merged = metrics.counter("outbox_merged_total")
+        self._retried = metrics.counter("outbox_retried_total")
+        self._dead = metrics.counter("outbox_dead_total")
+
+    async def put(self, session: AsyncSession, notification: Notification) -> None:
+        """Add a notification to the outbox as part of the session's transaction"""
+        session.add(self._to_message(notification))
+        # Wakes up senders in every process once the transaction commits
+        await notify(session, OUTBOX_CHANNEL, "")
+
+    async def defer(self, notification: Notification) -> None:
+        """Add a notification that could not be sent right away, in a transaction of its own"""
+        async with async_session_maker() as session:
+            await self.put(session, notification)
+            await session.commit()
+
+    async def hold(self, notification: Notification, delay: float) -> int:
+        """
+        Add a notification that the caller means to send itself, returning its ID.
+
+        It only becomes available to senders after ``delay`` seconds, in case the
+        caller dies first; otherwise the caller claims it with ``claim_held``.
+        """
+        message = self._to_message(notification, available_at=func.now() + timedelta(seconds=delay))
+        async with async_session_maker() as session:
+            session.add(message)
+            await session.flush()
+            await session.commit()
+            return message.id
+
+    async def claim_held(self, ids: list[int]) -> list[int]:
+        """
+        Claim held messages for sending, returning those no sender got to first.
+
+        Like messages claimed by a sender, they are marked as being sent, so a
+        message whose caller dies before deleting it is not sent again.
+        """
+        async with async_session_maker() as session:
+            claimed = list(
+                await session.scalars(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_(ids), OutboxMessage.status == DeliveryStatus.PENDING)
+                    .values(
+                        status=DeliveryStatus.PROCESSING,
+                        locked_at=func.now(),
+                        sent_at=func.now(),
+                        attempts=OutboxMessage.attempts + 1,
+                    )
+                    .returning(OutboxMessage.id)
+                )
+            )
+            await session.commit()
+        return claimed
+
+    async def release(self, ids: list[int]) -> None:
+        """Hand claimed messages that could not be sent to the senders"""
+        async with async_session_maker() as session:
+            await session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(ids))
+                .values(status=DeliveryStatus.PENDING, locked_at=None, sent_at=None, available_at=func.now())
+            )
+            await notify(session, OUTBOX_CHANNEL, "")
+            await session.commit()
+
+    async def delete(self, ids: list[int]) -> None:
+        """Remove messages that have been sent"""
+        async with async_session_maker() as session:
+            await session.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(ids)))
+            await session.commit()
+
+    def wake_up(self, payload: str = "") -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start the sender loop"""
+        self._stopping.clear()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="outbox-sender")
+            logger.info("Started outbox sender")
+
+    async def stop(self) -> None:
+        """Stop the sender loop, letting the batch in flight finish"""
+        if self._task is None:
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Outbox sender stopped")
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                batch = await self._claim()
+            except Exception as e:
+                logger.error("Failed to claim outbox messages: %s", e)
+                batch = []
+
+            if not batch:
+                await self._wait()
+                continue
+
+            heartbeat = asyncio.create_task(self._renew_claim([message.id for message in batch]))
+            try:
+                groups = self._group(batch)
+                results = await asyncio.gather(*(self._send(group) for group in groups), return_exceptions=True)
+                for group, result in zip(groups, results):
+                    # One group failing must not stop the sender
+                    if isinstance(result, Exception):
+                        logger.error("Failed to send outbox messages to chat %s: %s", group[0].chat_id, result)
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _wait(self) -> None:
+        """Sleep until the poll interval elapses or a message is added"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.TG_OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _claim(self) -> list[OutboxMessage]:
+        """Claim the oldest ready messages, skipping rows locked by other senders"""
+        # Compared on the database's clock, the one every sender shares
+        stale_before = func.now() - timedelta(seconds=settings.TG_OUTBOX_VISIBILITY_TIMEOUT)
+
+        async with async_session_maker() as session:
+            # Messages whose sender died mid-send may have reached the chat already
+            abandoned = await session.execute(
+                update(OutboxMessage)
+                .where(
+                    OutboxMessage.status == DeliveryStatus.PROCESSING,
+                    OutboxMessage.locked_at < stale_before,
+                    OutboxMessage.sent_at.is_not(None),
+                )
+                .values(
+                    status=DeliveryStatus.FAILED,
+                    locked_at=None,
+                    last_error="Sender stopped while sending; not retried to avoid a duplicate",
+                )
+            )
+            if abandoned.rowcount:
+                logger.error("Gave up on %d outbox messages abandoned mid-send", abandoned.rowcount)
+                self._dead.inc(abandoned.rowcount)
+
+            messages = list(
+                await session.scalars(
+                    select(OutboxMessage)
+                    .where(
+                        or_(
+                            and_(
+                                OutboxMessage.status == DeliveryStatus.PENDING,
+                                OutboxMessage.available_at <= func.now(),
+                            ),
+                            # Messages whose sender died before sending them
+                            and_(
+                                OutboxMessage.status == DeliveryStatus.PROCESSING,
+                                OutboxMessage.locked_at < stale_before,
+                                OutboxMessage.sent_at.is_(None),
+                            ),
+                        )
+                    )
+                    .order_by(OutboxMessage.created_at)
+                    .limit(settings.TG_OUTBOX_BATCH_SIZE)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+
+            for message in messages:
+                message.status = DeliveryStatus.PROCESSING
+                message.locked_at = func.now()
+                message.attempts += 1
+            await session.commit()
+            return messages
+
+    @staticmethod
+    async def _renew_claim(ids: list) -> None:
+        """Keep the claim on a batch fresh while it is being sent"""
+        while True:
+            await asyncio.sleep(settings.TG_OUTBOX_VISIBILITY_TIMEOUT / 3)
+            try:
+                async with async_session_maker() as session:
+                    await session.execute(
+                        update(OutboxMessage)
+                        .where(OutboxMessage.id.in_(ids), OutboxMessage.status == DeliveryStatus.PROCESSING)
+                        .values(locked_at=func.now())
+                    )
+                    await session.commit()
+            except Exception as e:
+                # The claim is still valid for a while, try again on the next tick
+                logger.warning("Failed to renew outbox claim: %s", e)
+
+    @staticmethod
+    async def _mark_sending(group: list[OutboxMessage]) -> list[OutboxMessage]:
+        """Mark messages as being sent, returning those no other sender got to first"""
+        async with async_session_maker() as session:
+            marked = set(
+                await session.scalars(
+                    update(OutboxMessage)
+                    .where(
+                        OutboxMessage.id.in_([message.id for message in group]),
+                        OutboxMessage.status == DeliveryStatus.PROCESSING,
+                        OutboxMessage.sent_at.is_(None),
+                    )
+                    .values(sent_at=func.now())
+                    .returning(OutboxMessage.id)
+                )
+            )
+            await session.commit()
+        return [message for message in group if message.id in marked]
+
+    @staticmethod
+    def _group(batch: list[OutboxMessage]) -> list[list[OutboxMessage]]:
+        """Group messages of the same chat and thread; other messages go alone"""
+        groups: dict[object, list[OutboxMessage]] = {}
+        for message in batch:
+            key = (message.chat_id, message.thread_key) if message.digest is not None else message.id
+            groups.setdefault(key, []).append(message)
+        return list(groups.values())
+
+    @staticmethod
+    def _to_message(notification: Notification, **values) -> OutboxMessage:
+        digest = notification.digest
+        return OutboxMessage(
+            chat_id=notification.chat_id,
+            text=notification.text,
+            url_buttons=notification.url_buttons,
+            thread_key=notification.thread_key,
+            digest_type=type(digest).__name__ if digest else None,
+            digest=digest.model_dump(mode="json") if digest else None,
+            status=DeliveryStatus.PENDING,
+            attempts=0,
+            **values,
+        )
+
+    @staticmethod
+    def _to_notification(message: OutboxMessage) -> Notification:
+        digest = None
+        if message.digest is not None:
+            digest = Digest.resolve(message.digest_type).model_validate(message.digest)
+
+        return Notification(
+            chat_id=message.chat_id,
+            text=message.text,
+            url_buttons=[tuple(button) for button in message.url_buttons] if message.url_buttons else None,
+            thread_key=message.thread_key,
+            digest=digest,
+        )
+
+    async def _send(self, group: list[OutboxMessage]) -> None:
+        try:
+            group = await self._mark_sending(group)
+        except Exception as e:
+            logger.error("Failed to mark outbox messages to chat %s as sending: %s", group[0].chat_id, e)
+            return
+        if not group:
+            return
+
+        try:
+            notification = self._to_notification(group[0])
+            for message in group[1:]:
+                notification = notification.merge(self._to_notification(message))
+                self._merged.inc()
+
+            await send_notification(notification)
+        except Exception as e:
+            logger.error("Failed to send outbox message to chat %s: %s", group[0].chat_id, e)
+            try:
+                await self._fail(group, error=str(e))
+            except Exception as e:
+                # Marked as being sent, the messages are given up on once their claim goes stale
+                logger.error("Failed to schedule a retry of outbox messages to chat %s: %s", group[0].chat_id, e)
+            return
+
+        self._sent.inc()
+        try:
+            await self.delete([message.id for message in group])
+        except Exception as e:
+            # Marked as being sent, the messages are given up on rather than sent again
+            logger.error("Failed to remove sent outbox messages to chat %s: %s", group[0].chat_id, e)
+
+    async def _fail(self, group: list[OutboxMessage], error: str) -> None:
+        """Schedule a retry with exponential backoff and jitter, or keep the messages as dead letters"""
+        attempts = max(message.attempts for message in group)
+        values = {"last_error": error, "locked_at": None, "sent_at": None, "status": DeliveryStatus.FAILED}
+
+        if attempts < settings.TG_OUTBOX_MAX_ATTEMPTS:
+            delay = min(settings.TG_OUTBOX_MAX_RETRY_DELAY, settings.TG_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+            # Jitter keeps senders from retrying in lockstep after an outage
+            delay = random.uniform(delay / 2, delay)
+            values["status"] = DeliveryStatus.PENDING
+            values["available_at"] = func.now() + timedelta(seconds=delay)
+            self._retried.inc()
+        else:
+            logger.error("Giving up on outbox message to chat %s after %d attempts", group[0].chat_id, attempts)
+            self._dead.inc()
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(OutboxMessage).where(OutboxMessage.id.in_([m.id for m in group])).values(**values)
+            )
+            await session.commit()
+
+
+notification_outbox = NotificationOutbox()
@@ -0,0 +1,185 @@
+import asyncio
+from datetime import timedelta
+from typing import Optional
+
+from pydantic import ValidationError
+from sqlalchemy import select, or_, and_, delete, func, update
+
+from config import settings
+from core import get_logger
+from core.enums import GHEventType
+from database import async_session_maker
+from database.enums import DeliveryStatus
+from database.models import WebhookDelivery
+
+logger = get_logger(__name__)
+
+
+class DeliveryQueue:
+    """
+    Postgres-backed queue of verified GitHub deliveries.
+
+    The webhook endpoint only writes the delivery and acknowledges it; a pool of
+    consumers inside each worker claims rows with ``FOR UPDATE SKIP LOCKED`` and
+    runs them through ``GitHubEventRegistry``. Rows are deleted once handled and
+    kept with ``FAILED`` status after the last attempt.
+    """
+
+    def __init__(self) -> None:
+        self._consumers: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    async def enqueue(self, event_type: GHEventType, delivery_id: str, payload: bytes | str) -> None:
+        """Persist a delivery for asynchronous processing"""
+        if isinstance(payload, str):
+            payload = payload.encode()
+
+        async with async_session_maker() as session:
+            session.add(
+                WebhookDelivery(
+                    delivery_id=delivery_id,
+                    event_type=event_type.value,
+                    payload=payload,
+                    status=DeliveryStatus.PENDING,
+                    attempts=0,
+                )
+            )
+            await session.commit()
+
+        # Wake up local consumers right away instead of waiting for the next poll
+        self._wakeup.set()
+
+    def start(self, consumers: int) -> None:
+        """Start the consumer pool"""
+        self._stopping.clear()
+        for i in range(consumers):
+            self._consumers.append(asyncio.create_task(self._consume(), name=f"delivery-consumer-{i}"))
+        logger.info("Started %d delivery queue consumers", consumers)
+
+    async def stop(self) -> None:
+        """Stop the consumer pool, letting in-flight deliveries finish"""
+        self._stopping.set()
+        self._wakeup.set()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers.clear()
+        logger.info("Delivery queue consumers stopped")
+
+    async def _consume(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                delivery = await self._claim()
+            except Exception as e:
+                logger.error("Failed to claim delivery: %s", e)
+                delivery = None
+
+            if delivery is None:
+                await self._wait()
+                continue
+
+            try:
+                await self._process(delivery)
+            except Exception as e:
+                # Recording the outcome failed; the row is claimed again after its visibility timeout
+                logger.error("Failed to finish delivery %s: %s", delivery.delivery_id, e, exc_info=True)
+
+    async def _wait(self) -> None:
+        """Sleep until the poll interval elapses or a new delivery is enqueued"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.GH_QUEUE_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _claim(self) -> Optional[WebhookDelivery]:
+        """Claim the oldest available delivery, skipping rows locked by other consumers"""
+        # The database clock, which also stamps new rows, so every worker agrees on what is due
+        stale_before = func.now() - timedelta(seconds=settings.GH_QUEUE_VISIBILITY_TIMEOUT)
+
+        async with async_session_maker() as session:
+            while True:
+                delivery = await session.scalar(
+                    select(WebhookDelivery)
+                    .where(
+                        or_(
+                            and_(
+                                WebhookDelivery.status == DeliveryStatus.PENDING,
+                                WebhookDelivery.available_at <= func.now(),
+                            ),
+                            # Deliveries whose consumer died mid-processing
+                            and_(
+                                WebhookDelivery.status == DeliveryStatus.PROCESSING,
+                                WebhookDelivery.locked_at < stale_before,
+                            ),
+                        )
+                    )
+                    .order_by(WebhookDelivery.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if delivery is None:
+                    return None
+
+                # A delivery that keeps taking its consumer down is not retried forever
+                if delivery.status == DeliveryStatus.PROCESSING and delivery.attempts >= settings.GH_QUEUE_MAX_ATTEMPTS:
+                    logger.error(
+                        "Discarding delivery %s: abandoned by %d consumers", delivery.delivery_id, delivery.attempts
+                    )
+                    delivery.status = DeliveryStatus.FAILED
+                    delivery.locked_at = None
+                    delivery.last_error = f"Abandoned mid-processing after {delivery.attempts} attempts"
+                    await session.commit()
+                    continue
+
+                break
+
+            delivery.status = DeliveryStatus.PROCESSING
+            delivery.locked_at = func.now()
+            delivery.attempts += 1
+            await session.commit()
+            return delivery
+
+    async def _process(self, delivery: WebhookDelivery) -> None:
+        from core.decorators import GitHubEventRegistry
+
+        try:
+            event_type = GHEventType(delivery.event_type)
+            handler = GitHubEventRegistry.get_handler(event_type)
+            event_model = GitHubEventRegistry.get_event_model(event_type)
+            if not handler or not event_model:
+                raise LookupError(f"No handler registered for event type: {event_type.value}")
+
+            event = event_model.from_json(delivery.payload)
+        except (ValueError, LookupError, ValidationError) as e:
+            # Retrying will not fix a payload we cannot parse
+            logger.error("Discarding delivery %s: %s", delivery.delivery_id, e)
+            await self._fail(delivery, error=str(e), retry=False)
+            return
+
+        try:
+            await handler(event=event)
+        except Exception as e:
+            logger.error("Error processing delivery %s: %s", delivery.delivery_id, e, exc_info=True)
+            await self._fail(delivery, error=str(e), retry=delivery.attempts < settings.GH_QUEUE_MAX_ATTEMPTS)
+            return
+
+        async with async_session_maker() as session:
+            await session.execute(delete(WebhookDelivery).where(WebhookDelivery.id == delivery.id))
+            await session.commit()
+
+        logger.info("Successfully processed %s delivery %s", event_type.value, delivery.delivery_id)
+
+    async def _fail(self, delivery: WebhookDelivery, error: str, retry: bool) -> None:
+        """Schedule a retry with exponential backoff, or park the delivery as failed"""
+        values = {"last_error": error, "locked_at": None, "status": DeliveryStatus.FAILED}
+        if retry:
+            delay = settings.GH_QUEUE_RETRY_DELAY * 2 ** (delivery.attempts - 1)
+            values["status"] = DeliveryStatus.PENDING
+            values["available_at"] = func.now() + timedelta(seconds=delay)
+
+        async with async_session_maker() as session:
+            await session.execute(update(WebhookDelivery).where(WebhookDelivery.id == delivery.id).values(**values))
+            await session.commit()
+
+
+delivery_queue = DeliveryQueue()
@@ -0,0 +1,170 @@
+"""
+Outbound rate limiting for the Telegram Bot API.
+
+Telegram allows a bot about 30 messages per second overall, about 20 per minute
+in a group and about one per second in a private chat. Every send first waits
+for a token from its chat's bucket, then from the global bucket, so bursts are
+paced below the limits instead of being answered with 429s.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from config import settings
+from core import get_logger
+from core.utils.cache import TTLCache
+from core.utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class RateLimitExceeded(Exception):
+    """Raised instead of waiting longer than a send's ``max_wait`` for the rate limit"""
+
+    def __init__(self, chat_id: int, delay: float) -> None:
+        super().__init__(f"Sending to chat {chat_id} would wait {delay:.1f}s for the rate limit")
+        self.chat_id = chat_id
+        self.delay = delay
+
+
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations.
+
+    Tokens may go negative: each reservation is served in order, after the
+    tokens taken by earlier reservations have been refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds a reservation made now would have to wait, without taking a token"""
+        self._refill(time.monotonic())
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def reserve(self) -> float:
+        """Take a token, returning the seconds to wait before it may be used"""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the given number of seconds"""
+        self._refill(time.monotonic())
+        # Leave the next reservation exactly ``seconds`` away
+        self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+
+class TelegramRateLimiter:
+    """
+    Paces Telegram API calls with a global bucket and one bucket per chat.
+
+    The global limit applies to the bot as a whole, so each process gets an
+    equal share of it; see ``configure``. Per-chat buckets keep the full rate: a
+    share of a group's 20 messages a minute would leave each worker waiting half
+    a minute per message. They are exact where sends are centralised, in the
+    dedicated sender, and elsewhere an occasional 429 is retried.
+    """
+
+    def __init__(self) -> None:
+        self._share = 1.0
+        self._global = self._global_bucket()
+        self._chats = TTLCache(maxsize=settings.TG_RATE_CHAT_BUCKETS, ttl=300)
+
+        self._waiting = metrics.gauge("telegram_send_waiting")
+        self._throttled = {
+            "chat": metrics.counter("telegram_send_throttled_total", bucket="chat"),
+            "global": metrics.counter("telegram_send_throttled_total", bucket="global"),
+        }
+        self._retry_after = metrics.counter("telegram_retry_after_total")
+        self._deferred = metrics.counter("telegram_send_deferred_total")
+
+    def configure(self, processes: int) -> None:
+        """Split the global limit between ``processes`` processes sending for the same bot"""
+        self._share = 1 / max(processes, 1)
+        self._global = self._global_bucket()
+        self._chats.clear()
+
+    def _global_bucket(self) -> TokenBucket:
+        rate = settings.TG_RATE_GLOBAL_PER_SECOND * self._share
+        return TokenBucket(rate=rate, capacity=max(1.0, rate))
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Group and channel IDs are negative
+            per_second = settings.TG_RATE_GROUP_PER_MINUTE / 60 if chat_id < 0 else settings.TG_RATE_PRIVATE_PER_SECOND
+            bucket = TokenBucket(rate=per_second, capacity=settings.TG_RATE_CHAT_BURST)
+
+        # Re-inserting keeps buckets of active chats from expiring
+        self._chats.set(chat_id, bucket)
+        return bucket
+
+    async def _wait(self, bucket: TokenBucket, name: str) -> None:
+        delay = bucket.reserve()
+        if delay <= 0:
+            return
+
+        self._throttled[name].inc()
+        await asyncio.sleep(delay)
+
+    async def send(self, chat_id: int, call: Callable[[], Awaitable[T]], max_wait: Optional[float] = None) -> T:
+        """
+        Run an API call for ``chat_id`` once both buckets allow it.
+
+        A 429 pauses the chat's bucket for ``retry_after`` seconds and the call is
+        retried, up to ``TG_SEND_MAX_RETRIES`` times.
+
+        :param max_wait: Seconds the call may wait for the buckets or a 429, unlimited by default
+        :raises RateLimitExceeded: If the call would have to wait longer than ``max_wait``;
+            no token is taken then
+        """
+        for attempt in range(settings.TG_SEND_MAX_RETRIES + 1):
+            chat_bucket = self._chat_bucket(chat_id)
+            if max_wait is not None:
+                delay = chat_bucket.wait_time() + self._global.wait_time()
+                if delay > max_wait:
+                    self._deferred.inc()
+                    raise RateLimitExceeded(chat_id, delay)
+
+            started = time.perf_counter()
+            self._waiting.inc()
+            try:
+                await self._wait(chat_bucket, "chat")
+                await self._wait(self._global, "global")
+            finally:
+                self._waiting.dec()
+            metrics.histogram("telegram_send_wait_seconds", buckets=WAIT_BUCKETS).observe(time.perf_counter() - started)
+
+            try:
+                return await call()
+            except TelegramRetryAfter as e:
+                self._retry_after.inc()
+                if attempt == settings.TG_SEND_MAX_RETRIES:
+                    raise
+
+                logger.warning("Telegram asked to retry chat %s after %ss", chat_id, e.retry_after)
+                self._chat_bucket(chat_id).pause(e.retry_after)
+                if max_wait is not None and e.retry_after > max_wait:
+                    self._deferred.inc()
+                    raise RateLimitExceeded(chat_id, e.retry_after) from e
+
+
+telegram_limiter = TelegramRateLimiter()
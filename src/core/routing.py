@@ -0,0 +1,82 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core import get_logger
+from core.utils.cache import TTLCache
+from core.utils.metrics import metrics
+from database.models import Chat, GithubRepository
+
+logger = get_logger(__name__)
+
+# Channel on which repository routing changes are announced
+ROUTING_CHANNEL = GithubRepository.__notify_channel__
+
+
+class RepoRoutingCache:
+    """
+    Per-worker cache of repository name to Telegram chat ID.
+
+    Routing only changes when a repository is registered or connected to a chat;
+    those writes NOTIFY ``ROUTING_CHANNEL`` and every worker drops the entry.
+    Repositories without a chat are remembered as well, so their deliveries are
+    dropped without a query.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_maxsize: int, negative_ttl: float) -> None:
+        self._chats = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._unconnected = TTLCache(maxsize=negative_maxsize, ttl=negative_ttl)
+        self._generation = 0
+        self._avoided = {
+            "connected": metrics.counter("routing_avoided_queries_total", result="connected"),
+            "unconnected": metrics.counter("routing_avoided_queries_total", result="unconnected"),
+        }
+        self._queries = metrics.counter("routing_queries_total")
+
+    async def get_chat_id(self, session: AsyncSession, repo_name: str) -> Optional[int]:
+        """Get the chat ID the repository is connected to"""
+        chat_id = self._chats.get(repo_name)
+        if chat_id is not None:
+            self._avoided["connected"].inc()
+            return chat_id
+
+        if repo_name in self._unconnected:
+            self._avoided["unconnected"].inc()
+            logger.debug("Repository %s is not connected to any chat", repo_name)
+            return None
+
+        self._queries.inc()
+        generation = self._generation
+        chat = await Chat.get_by_repo(session, repo_name)
+
+        # Skip caching if an invalidation arrived while the query was running
+        cacheable = generation == self._generation
+
+        if chat is None:
+            logger.warning("Repository %s is not connected to any chat", repo_name)
+            if cacheable:
+                self._unconnected.set(repo_name)
+            return None
+
+        if cacheable:
+            self._chats.set(repo_name, chat.chat_id)
+        return chat.chat_id
+
+    def invalidate(self, repo_name: str) -> None:
+        self._generation += 1
+        self._chats.pop(repo_name)
+        self._unconnected.pop(repo_name)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._chats.clear()
+        self._unconnected.clear()
+
+
+routing_cache = RepoRoutingCache(
+    maxsize=settings.GH_ROUTING_CACHE_SIZE,
+    ttl=settings.GH_ROUTING_CACHE_TTL,
+    negative_maxsize=settings.GH_ROUTING_NEGATIVE_CACHE_SIZE,
+    negative_ttl=settings.GH_ROUTING_NEGATIVE_CACHE_TTL,
+)
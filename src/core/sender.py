@@ -0,0 +1,68 @@
+import asyncio
+import signal
+
+from config import settings
+from core import get_logger
+from core.locks import LeaseLostError, lease
+
+logger = get_logger(__name__)
+
+SENDER_LEASE = "telegram_sender"
+
+
+async def run_sender() -> None:
+    """
+    Run the outbox sender as the single Telegram sender for the bot.
+
+    Any number of sender processes can be started; they elect a leader through
+    a lease and only the leader sends, with the whole rate limit and the one
+    bot session to itself. The others stand by and take over if the leader's
+    lease expires.
+    """
+    import handlers.github  # noqa: F401 - registers the digest types stored in the outbox
+    from core.bot import bot, warm_bot_session
+    from core.outbox import OUTBOX_CHANNEL, notification_outbox
+    from core.ratelimit import telegram_limiter
+    from database import close_db
+    from database.listener import listener
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    # This process paces every send of the bot
+    telegram_limiter.configure(processes=1)
+
+    listener.subscribe(OUTBOX_CHANNEL, notification_outbox.wake_up)
+    listener.start()
+
+    try:
+        await warm_bot_session()
+
+        while not stopping.is_set():
+            try:
+                async with lease(SENDER_LEASE, ttl=settings.TG_SENDER_LEASE_TTL) as leader:
+                    if leader:
+                        logger.info("Elected as the Telegram sender")
+                        notification_outbox.start()
+                        try:
+                            await stopping.wait()
+                        finally:
+                            await notification_outbox.stop()
+                        continue
+            except LeaseLostError:
+                logger.warning("Lost the Telegram sender lease, standing by")
+            except Exception as e:
+                logger.error("Sender election failed: %s", e)
+
+            # Another process is sending; check again before its lease could expire
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=settings.TG_SENDER_LEASE_TTL / 3)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await listener.stop()
+        await bot.session.close()
+        await close_db()
+        logger.info("Sender stopped")
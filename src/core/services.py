@@ -0,0 +1,61 @@
+from config import settings
+
+
+async def start_services() -> None:
+    """Start the background services of a webhook worker"""
+    from core.routing import ROUTING_CHANNEL, routing_cache
+    from database.listener import listener
+
+    listener.subscribe(ROUTING_CHANNEL, routing_cache.invalidate, on_reset=routing_cache.clear)
+
+    # Workers send from the outbox, which also takes rate-limited notifications,
+    # unless a dedicated sender does it for them
+    if not settings.TG_DEDICATED_SENDER:
+        from core.outbox import OUTBOX_CHANNEL, notification_outbox
+
+        listener.subscribe(OUTBOX_CHANNEL, notification_outbox.wake_up)
+        notification_outbox.start()
+
+    listener.start()
+
+    if settings.GH_DEDUP_ENABLED:
+        from core.dedup import deduplicator
+
+        deduplicator.start()
+
+    if settings.GH_WEBHOOK_ASYNC:
+        from core.queue import delivery_queue
+
+        delivery_queue.start(consumers=settings.GH_QUEUE_CONSUMERS)
+
+
+async def stop_services() -> None:
+    """Stop the background services of a webhook worker"""
+    from database.listener import listener
+
+    await listener.stop()
+
+    if settings.GH_DEDUP_ENABLED:
+        from core.dedup import deduplicator
+
+        await deduplicator.stop()
+
+    if not settings.TG_DEDICATED_SENDER:
+        from core.outbox import notification_outbox
+
+        await notification_outbox.stop()
+
+    if settings.GH_WEBHOOK_ASYNC:
+        from core.queue import delivery_queue
+
+        await delivery_queue.stop()
+
+    from core.decorators import GitHubEventRegistry
+
+    await GitHubEventRegistry.wait_background()
+
+    if settings.TG_COALESCE_ENABLED:
+        from core.coalesce import coalescer
+
+        # Don't drop notifications still waiting for their window
+        await coalescer.flush()
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, UTC
+from typing import NamedTuple, Optional
+
+from aiogram.exceptions import TelegramBadRequest
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from core import get_logger
+from core.utils.bot import Notification, edit_message, send_message
+from core.utils.cache import TTLCache
+from core.utils.metrics import metrics
+from database import async_session_maker
+from database.models import MessageThread
+
+logger = get_logger(__name__)
+
+# Edits of a thread that are retried because another worker saved it first
+MAX_CONFLICTS = 5
+
+
+class ThreadMessage(NamedTuple):
+    message_id: int
+    digest: dict
+    sent_at: datetime
+    version: int
+
+
+# Columns of a thread row, in the order of ThreadMessage
+_COLUMNS = (MessageThread.message_id, MessageThread.digest, MessageThread.sent_at, MessageThread.version)
+
+
+class MessageThreads:
+    """
+    Keeps one message per notification thread up to date by editing it.
+
+    While the last message of a thread is younger than the edit window, a new
+    notification for the thread is merged into that message's digest and the
+    message is edited instead of a new one being sent. The thread's message and
+    cumulative digest live in ``tg_message_threads``, the only source of truth
+    for every worker; a per-worker index in front of the table is just a hint.
+
+    No lock is held across the Telegram round-trip. Each save is a
+    compare-and-set on the version of the row the edit was merged from. When
+    another worker saved the thread in between, the row is read again and the
+    message is edited once more from it, so the last edit always has every
+    notification. A new thread is created with an upsert that only replaces
+    the row it saw, if any.
+    """
+
+    def __init__(self, maxsize: int, window: float) -> None:
+        self.window = window
+        self._index = TTLCache(maxsize=maxsize, ttl=window)
+
+        self._sent = metrics.counter("message_threads_total", action="sent")
+        self._edited = metrics.counter("message_threads_total", action="edited")
+        self._fallbacks = metrics.counter("message_threads_edit_fallbacks_total")
+        self._conflicts = metrics.counter("message_threads_conflicts_total")
+
+    async def send(self, notification: Notification, max_wait: Optional[float] = None) -> None:
+        """
+        Edit the thread's recent message to include the notification, or send a new one
+
+        Raises:
+            RateLimitExceeded: If it would wait longer than ``max_wait`` for the rate limit
+        """
+        from core.bot import bot
+
+        key = (notification.chat_id, notification.thread_key)
+        thread = self._index.get(key) or await self._load(key)
+
+        for _ in range(MAX_CONFLICTS):
+            if thread is None or self._remaining(thread) <= 0:
+                break
+
+            digest = type(notification.digest).model_validate(thread.digest).merge(notification.digest)
+            text, url_buttons = digest.render()
+            try:
+                await edit_message(bot, key[0], thread.message_id, text, url_buttons, max_wait)
+            except TelegramBadRequest as e:
+                # Deleted or no longer editable: start a new message for the thread
+                logger.warning("Could not edit message %s in chat %s: %s", thread.message_id, key[0], e.message)
+                self._fallbacks.inc()
+                break
+
+            self._edited.inc()
+            try:
+                saved = await self._save_digest(key, thread, digest.model_dump(mode="json"))
+            except Exception as e:
+                # The message is out already; failing here would only get it sent again
+                logger.error("Failed to persist message thread %s: %s", key[1], e)
+                self._index.pop(key)
+                return
+            if saved is not None:
+                self._remember(key, saved)
+                return
+
+            # Saved by another worker since it was read: edit again from the current row
+            self._conflicts.inc()
+            thread = await self._load(key)
+        else:
+            logger.warning("Gave up on message thread %s after %s conflicting saves", key[1], MAX_CONFLICTS)
+            self._index.pop(key)
+            return
+
+        message = await send_message(bot, key[0], notification.text, notification.url_buttons, max_wait)
+        self._sent.inc()
+        try:
+            saved = await self._save_message(
+                key, thread, message.message_id, notification.digest.model_dump(mode="json")
+            )
+        except Exception as e:
+            logger.error("Failed to persist message thread %s: %s", key[1], e)
+            saved = None
+
+        if saved is not None:
+            self._remember(key, saved)
+        else:
+            # Another worker started a message for the thread too; later notifications edit that one
+            self._index.pop(key)
+
+    def _remember(self, key: tuple[int, str], thread: ThreadMessage) -> None:
+        self._index.set(key, thread, ttl=self._remaining(thread))
+
+    def _remaining(self, thread: ThreadMessage) -> float:
+        """Seconds left before the thread's message is too old to edit"""
+        return (thread.sent_at + timedelta(seconds=self.window) - datetime.now(UTC)).total_seconds()
+
+    async def _load(self, key: tuple[int, str]) -> Optional[ThreadMessage]:
+        """The thread's row, even if its message is too old to edit, so that replacing it can be checked"""
+        try:
+            async with async_session_maker() as session:
+                row = (
+                    await session.execute(
+                        select(*_COLUMNS).where(MessageThread.chat_id == key[0], MessageThread.thread_key == key[1])
+                    )
+                ).one_or_none()
+        except Exception as e:
+            logger.error("Failed to look up message thread %s: %s", key[1], e)
+            return None
+
+        return ThreadMessage(*row) if row is not None else None
+
+    @staticmethod
+    async def _save_digest(key: tuple[int, str], thread: ThreadMessage, digest: dict) -> Optional[ThreadMessage]:
+        """Save the merged digest, unless the row changed since ``thread`` was read"""
+        async with async_session_maker() as session:
+            row = (
+                await session.execute(
+                    update(MessageThread)
+                    .where(
+                        MessageThread.chat_id == key[0],
+                        MessageThread.thread_key == key[1],
+                        MessageThread.message_id == thread.message_id,
+                        MessageThread.version == thread.version,
+                    )
+                    .values(digest=digest, version=MessageThread.version + 1)
+                    .returning(*_COLUMNS)
+                )
+            ).one_or_none()
+            await session.commit()
+
+        return ThreadMessage(*row) if row is not None else None
+
+    @staticmethod
+    async def _save_message(
+        key: tuple[int, str], thread: Optional[ThreadMessage], message_id: int, digest: dict
+    ) -> Optional[ThreadMessage]:
+        """Make a new message the thread's, unless the row changed since ``thread`` was read"""
+        stmt = insert(MessageThread).values(
+            chat_id=key[0], thread_key=key[1], message_id=message_id, digest=digest, sent_at=func.now()
+        )
+        if thread is None:
+            # Another worker created the thread in the meantime
+            stmt = stmt.on_conflict_do_nothing(index_elements=[MessageThread.chat_id, MessageThread.thread_key])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MessageThread.chat_id, MessageThread.thread_key],
+                set_={
+                    "message_id": stmt.excluded.message_id,
+                    "digest": stmt.excluded.digest,
+                    "sent_at": stmt.excluded.sent_at,
+                    "version": MessageThread.version + 1,
+                    "updated_at": func.now(),
+                },
+                where=MessageThread.version == thread.version,
+            )
+
+        async with async_session_maker() as session:
+            row = (await session.execute(stmt.returning(*_COLUMNS))).one_or_none()
+            await session.commit()
+
+        return ThreadMessage(*row) if row is not None else None
+
+
+message_threads = MessageThreads(maxsize=settings.TG_EDIT_INDEX_SIZE, window=settings.TG_EDIT_WINDOW)
@@ -1,8 +1,86 @@
-from typing import Optional, List, Tuple
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from abc import ABC, abstractmethod
+from typing import ClassVar, Optional, List, Self, Tuple
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, Message
+from pydantic import BaseModel
 
+from config import settings
+from core import get_logger
 
-async def send_message(bot, chat_id: int, text: str, url_buttons: Optional[List[Tuple[str, str]]] = None) -> None:
+logger = get_logger(__name__)
+
+
+class Digest(BaseModel, ABC):
+    """Structured facts behind a notification, which can be merged with later ones"""
+
+    # Subclasses by name, to restore digests that were stored as JSON
+    _types: ClassVar[dict[str, type["Digest"]]] = {}
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        Digest._types[cls.__name__] = cls
+
+    @classmethod
+    def resolve(cls, name: str) -> type["Digest"]:
+        """Get the digest subclass with the given name"""
+        return cls._types[name]
+
+    @abstractmethod
+    def merge(self, other: Self) -> Self:
+        """Combine with the digest of a later notification"""
+
+    @abstractmethod
+    def render(self) -> Tuple[str, Optional[List[Tuple[str, str]]]]:
+        """Render the message text and URL buttons"""
+
+
+class Notification(BaseModel):
+    """A rendered message that an event handler wants delivered to a chat"""
+
+    chat_id: int
+    text: str
+    url_buttons: Optional[List[Tuple[str, str]]] = None
+
+    # Notifications for the same chat and thread key may be merged through their digests
+    thread_key: Optional[str] = None
+    digest: Optional[Digest] = None
+
+    @property
+    def mergeable(self) -> bool:
+        return self.thread_key is not None and self.digest is not None
+
+    def merge(self, other: "Notification") -> "Notification":
+        """Combine with a later notification for the same chat and thread"""
+        digest = self.digest.merge(other.digest)
+        text, url_buttons = digest.render()
+        return Notification(
+            chat_id=self.chat_id,
+            text=text,
+            url_buttons=url_buttons,
+            thread_key=self.thread_key,
+            digest=digest,
+        )
+
+
+def _build_reply_markup(url_buttons: Optional[List[Tuple[str, str]]]) -> Optional[InlineKeyboardMarkup]:
+    """Build an inline keyboard with one URL button per row"""
+    if not url_buttons:
+        return None
+
+    keyboard = []
+    for button_text, url in url_buttons:
+        keyboard.append([InlineKeyboardButton(text=button_text, url=url)])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+async def send_message(
+    bot,
+    chat_id: int,
+    text: str,
+    url_buttons: Optional[List[Tuple[str, str]]] = None,
+    max_wait: Optional[float] = None,
+) -> Message:
     """
     Send a message using the bot instance with optional URL buttons
 
@@ -11,14 +89,104 @@ async def send_message(bot, chat_id: int, text: str, url_buttons: Optional[List[
         chat_id: Chat ID to send the message to
         text: Message text (supports HTML formatting)
         url_buttons: Optional list of tuples (button_text, url) for inline keyboard buttons
+        max_wait: Seconds the message may wait for the rate limit, unlimited by default
+
+    Returns:
+        The sent message
+
+    Raises:
+        RateLimitExceeded: If the message would wait longer than ``max_wait``
     """
-    reply_markup = None
+    from core.ratelimit import telegram_limiter
+
+    reply_markup = _build_reply_markup(url_buttons)
+    return await telegram_limiter.send(
+        chat_id,
+        lambda: bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup),
+        max_wait=max_wait,
+    )
+
+
+async def edit_message(
+    bot,
+    chat_id: int,
+    message_id: int,
+    text: str,
+    url_buttons: Optional[List[Tuple[str, str]]] = None,
+    max_wait: Optional[float] = None,
+) -> None:
+    """
+    Replace the text and URL buttons of a message sent by the bot
+
+    Raises:
+        TelegramBadRequest: If the message no longer exists or can't be edited
+        RateLimitExceeded: If the edit would wait longer than ``max_wait``
+    """
+    from core.ratelimit import telegram_limiter
+
+    reply_markup = _build_reply_markup(url_buttons)
+    try:
+        await telegram_limiter.send(
+            chat_id,
+            lambda: bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text, reply_markup=reply_markup),
+            max_wait=max_wait,
+        )
+    except TelegramBadRequest as e:
+        # Editing to identical content is not an error for us
+        if "message is not modified" not in e.message:
+            raise
+
+
+async def send_notification(notification: Notification, max_wait: Optional[float] = None) -> None:
+    """
+    Send a notification right away, editing the thread's recent message instead if there is one
+
+    Raises:
+        RateLimitExceeded: If it would wait longer than ``max_wait`` for the rate limit
+    """
+    if settings.TG_EDIT_IN_PLACE and notification.mergeable:
+        from core.threads import message_threads
+
+        await message_threads.send(notification, max_wait=max_wait)
+        return
+
+    from core.bot import bot
+
+    await send_message(
+        bot=bot,
+        chat_id=notification.chat_id,
+        text=notification.text,
+        url_buttons=notification.url_buttons,
+        max_wait=max_wait,
+    )
+
+
+async def deliver(notification: Notification) -> None:
+    """
+    Deliver a notification returned by an event handler.
+
+    Called once the handler's database session has been released, so that no
+    pooled connection is held during the Telegram round-trip. Mergeable
+    notifications are held in the outbox and handed to the coalescer, which
+    sends them after a short window together with any that follow for the same
+    thread.
+
+    Others are sent within the webhook request, but never wait for the rate
+    limit longer than ``TG_SEND_MAX_WAIT``: a notification that would is written
+    to the outbox and sent from there.
+    """
+    if settings.TG_COALESCE_ENABLED and notification.mergeable:
+        from core.coalesce import coalescer
+
+        await coalescer.submit(notification)
+        return
+
+    from core.ratelimit import RateLimitExceeded
 
-    if url_buttons:
-        # Create inline keyboard with URL buttons
-        keyboard = []
-        for button_text, url in url_buttons:
-            keyboard.append([InlineKeyboardButton(text=button_text, url=url)])
-        reply_markup = InlineKeyboardMarkup(inline_keyboard=keyboard)
+    try:
+        await send_notification(notification, max_wait=settings.TG_SEND_MAX_WAIT)
+    except RateLimitExceeded as e:
+        from core.outbox import notification_outbox
 
-    await bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+        logger.info("Deferring notification to the outbox: %s", e)
+        await notification_outbox.defer(notification)
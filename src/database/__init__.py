@@ -10,7 +10,10 @@ from database.config import (
     engine,
     get_db,
     init_db,
+    init_engine,
+    recommend_pool_size,
 )
+from database.session import LazySession, lazy_session
 from database import enums
 
 __all__ = [
@@ -19,6 +22,10 @@ __all__ = [
     "async_session_maker",
     "get_db",
     "init_db",
+    "init_engine",
+    "recommend_pool_size",
     "close_db",
+    "LazySession",
+    "lazy_session",
     "enums",
 ]
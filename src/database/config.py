@@ -1,5 +1,7 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from uuid import uuid4
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -9,12 +11,70 @@ from sqlalchemy.ext.asyncio import (
 
 from config import settings
 
+
+def recommend_pool_size(workers: int, max_connections: int, reserved: int = 0) -> tuple[int, int]:
+    """
+    Split the Postgres connection budget between worker processes.
+
+    Each worker also holds one connection for LISTEN, which is taken out of its
+    share. Half of the rest is kept open in the pool, the other half is overflow.
+
+    :param workers: Number of worker processes sharing the database
+    :param max_connections: Postgres ``max_connections``
+    :param reserved: Connections kept free for superusers, migrations and other clients
+    :return: ``pool_size`` and ``max_overflow`` for each worker's engine
+    """
+    per_worker = (max_connections - reserved) // max(workers, 1) - 1
+    if per_worker < 1:
+        raise ValueError(f"{max_connections} connections cannot serve {workers} workers with {reserved} reserved")
+
+    pool_size = max(1, per_worker // 2)
+    return pool_size, per_worker - pool_size
+
+
+def pool_limits(workers: Optional[int] = None) -> tuple[int, int]:
+    """
+    ``pool_size`` and ``max_overflow`` of a worker's engine.
+
+    When ``DATABASE_MAX_CONNECTIONS`` is set and the number of workers is known,
+    the pool is sized with ``recommend_pool_size`` instead of the fixed settings.
+    """
+    if workers and settings.DATABASE_MAX_CONNECTIONS:
+        return recommend_pool_size(workers, settings.DATABASE_MAX_CONNECTIONS, settings.DATABASE_RESERVED_CONNECTIONS)
+    return settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW
+
+
+def create_engine(workers: Optional[int] = None) -> AsyncEngine:
+    """Create the async engine from settings, with the pool sized by ``pool_limits``"""
+    pool_size, max_overflow = pool_limits(workers)
+
+    url = make_url(settings.DATABASE_URL)
+    connect_args = {"statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE}
+
+    if settings.DATABASE_PGBOUNCER_MODE:
+        # In transaction pooling, consecutive statements may run on different server
+        # connections, so prepared statements must neither be cached nor reuse names
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+
+    return create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        future=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
 # Create async engine
-engine: AsyncEngine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    future=True,
-)
+engine: AsyncEngine = create_engine()
 
 # Create async session factory
 async_session_maker = async_sessionmaker(
@@ -26,6 +86,24 @@ async_session_maker = async_sessionmaker(
 )
 
 
+def init_engine(workers: Optional[int] = None) -> AsyncEngine:
+    """
+    Replace the engine with a fresh one for this process.
+
+    Call it in each worker right after the fork: connections inherited from the
+    parent are left to it instead of being closed or shared. The session factory
+    is rebound in place, so modules that imported it keep working.
+    """
+    global engine
+
+    # Drop the inherited pool without touching its connections
+    engine.sync_engine.dispose(close=False)
+
+    engine = create_engine(workers)
+    async_session_maker.configure(bind=engine)
+    return engine
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for getting async database sessions.
@@ -6,3 +6,10 @@ class ChatType(str, enum.Enum):
     PRIVATE = "private"
     GROUP = "group"
     CHANNEL = "channel"
+
+
+class DeliveryStatus(str, enum.Enum):
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    FAILED = "failed"
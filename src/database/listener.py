@@ -0,0 +1,111 @@
+import asyncio
+from collections import defaultdict
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from core import get_logger
+
+logger = get_logger(__name__)
+
+
+async def notify(session: AsyncSession, channel: str, payload: str) -> None:
+    """
+    Queue a Postgres NOTIFY on the session's transaction.
+
+    Listeners receive it only once the transaction commits, and never if it rolls back.
+    """
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class PGListener:
+    """
+    Dedicated Postgres connection that LISTENs on channels for this worker.
+
+    The connection lives outside the SQLAlchemy pool. If it drops, it is
+    re-established and every ``on_reset`` callback runs, since notifications
+    sent in the meantime are lost.
+    """
+
+    def __init__(self) -> None:
+        self._callbacks: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+        self._reset_callbacks: list[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(
+        self,
+        channel: str,
+        callback: Callable[[str], None],
+        on_reset: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Call ``callback`` with the payload of every notification on ``channel``"""
+        self._callbacks[channel].append(callback)
+        if on_reset:
+            self._reset_callbacks.append(on_reset)
+
+    def start(self) -> None:
+        if settings.DATABASE_PGBOUNCER_MODE and not settings.DATABASE_LISTEN_URL:
+            logger.warning("LISTEN does not work through PgBouncer in transaction mode; set DATABASE_LISTEN_URL")
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="pg-listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @staticmethod
+    def _dsn() -> str:
+        url = make_url(settings.DATABASE_LISTEN_URL or settings.DATABASE_URL)
+        return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def _run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self._dsn())
+                for channel in self._callbacks:
+                    await connection.add_listener(channel, self._dispatch)
+                logger.info("Listening on %s", ", ".join(self._callbacks))
+
+                self._reset()
+
+                # Keep the connection checked so that a silent drop is noticed
+                while not connection.is_closed():
+                    await asyncio.sleep(settings.DATABASE_LISTEN_HEALTHCHECK_INTERVAL)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                if connection is not None:
+                    await connection.close()
+                raise
+            except Exception as e:
+                logger.error("Listener connection lost: %s", e)
+
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+            await asyncio.sleep(settings.DATABASE_LISTEN_RECONNECT_DELAY)
+
+    def _reset(self) -> None:
+        for callback in self._reset_callbacks:
+            callback()
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str) -> None:
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.error("Error handling notification on %s: %s", channel, e)
+
+
+listener = PGListener()
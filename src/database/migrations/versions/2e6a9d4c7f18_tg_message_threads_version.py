@@ -0,0 +1,28 @@
+"""tg_message_threads version
+
+Revision ID: 2e6a9d4c7f18
+Revises: 9c4e6b1f3a75
+Create Date: 2026-10-18 21:07:41.318526
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "2e6a9d4c7f18"
+down_revision: Union[str, Sequence[str], None] = "9c4e6b1f3a75"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tg_message_threads", sa.Column("version", sa.Integer(), server_default="0", nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tg_message_threads", "version")
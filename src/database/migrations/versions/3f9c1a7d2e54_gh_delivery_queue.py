@@ -0,0 +1,82 @@
+"""gh_delivery_queue
+
+Revision ID: 3f9c1a7d2e54
+Revises: 09e2ed83bb82
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3f9c1a7d2e54"
+down_revision: Union[str, Sequence[str], None] = "09e2ed83bb82"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "gh_delivery_queue",
+        sa.Column("delivery_id", sa.String(length=64), nullable=False),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "PROCESSING", "FAILED", name="deliverystatus"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column(
+            "available_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_gh_delivery_queue_delivery_id"),
+        "gh_delivery_queue",
+        ["delivery_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_gh_delivery_queue_status_available_at",
+        "gh_delivery_queue",
+        ["status", "available_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_gh_delivery_queue_status_available_at",
+        table_name="gh_delivery_queue",
+    )
+    op.drop_index(
+        op.f("ix_gh_delivery_queue_delivery_id"),
+        table_name="gh_delivery_queue",
+    )
+    op.drop_table("gh_delivery_queue")
+    sa.Enum(name="deliverystatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,72 @@
+"""tg_outbox
+
+Revision ID: 4b7f0d2e9a63
+Revises: e83b4f9a2c17
+Create Date: 2026-10-18 16:40:12.118093
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "4b7f0d2e9a63"
+down_revision: Union[str, Sequence[str], None] = "e83b4f9a2c17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tg_outbox",
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("url_buttons", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("thread_key", sa.String(length=512), nullable=True),
+        sa.Column("digest_type", sa.String(length=255), nullable=True),
+        sa.Column("digest", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "status",
+            postgresql.ENUM("PENDING", "PROCESSING", "FAILED", name="deliverystatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column(
+            "available_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tg_outbox_status_available_at",
+        "tg_outbox",
+        ["status", "available_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tg_outbox_status_available_at", table_name="tg_outbox")
+    op.drop_table("tg_outbox")
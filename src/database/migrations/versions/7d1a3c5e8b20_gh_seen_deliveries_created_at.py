@@ -0,0 +1,27 @@
+"""gh_seen_deliveries created_at index
+
+Revision ID: 7d1a3c5e8b20
+Revises: 4b7f0d2e9a63
+Create Date: 2026-10-18 18:05:41.372019
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "7d1a3c5e8b20"
+down_revision: Union[str, Sequence[str], None] = "4b7f0d2e9a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_gh_seen_deliveries_created_at", "gh_seen_deliveries", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_gh_seen_deliveries_created_at", table_name="gh_seen_deliveries")
@@ -0,0 +1,28 @@
+"""tg_outbox sent_at
+
+Revision ID: 9c4e6b1f3a75
+Revises: 7d1a3c5e8b20
+Create Date: 2026-10-18 18:52:13.604217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "9c4e6b1f3a75"
+down_revision: Union[str, Sequence[str], None] = "7d1a3c5e8b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("tg_outbox", sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tg_outbox", "sent_at")
@@ -1,7 +1,13 @@
-from database.models.telegram import Chat
-from database.models.github import GithubRepository
+from database.models.telegram import Chat, MessageThread, OutboxMessage
+from database.models.github import GithubRepository, WebhookDelivery, SeenDelivery
+from database.models.lock import Lease
 
 __all__ = [
     "Chat",
+    "MessageThread",
+    "OutboxMessage",
     "GithubRepository",
+    "WebhookDelivery",
+    "SeenDelivery",
+    "Lease",
 ]
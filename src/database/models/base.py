@@ -1,6 +1,7 @@
 import uuid
 
 from datetime import datetime, UTC
+from typing import ClassVar, Optional
 from uuid import UUID
 
 from sqlalchemy import DateTime, func
@@ -15,12 +16,29 @@ class Base(BaseORMClass, DeclarativeBase):
 
     id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
 
+    # Postgres channel notified when an instance changes, if any
+    __notify_channel__: ClassVar[Optional[str]] = None
+
     async def update(self, session: AsyncSession, **kwargs) -> None:
         """Update the model instance with given keyword arguments."""
         for key, value in kwargs.items():
             setattr(self, key, value)
         session.add(self)
         await session.flush()
+        await self.notify_change(session)
+
+    async def notify_change(self, session: AsyncSession) -> None:
+        """NOTIFY listeners of ``__notify_channel__`` once the transaction commits."""
+        if self.__notify_channel__ is None:
+            return
+
+        from database.listener import notify
+
+        await notify(session, self.__notify_channel__, self.notify_payload())
+
+    def notify_payload(self) -> str:
+        """Payload sent with change notifications."""
+        return str(self.id)
 
     async def delete(self, session: AsyncSession) -> None:
         """Delete the model instance from the database."""
@@ -1,10 +1,12 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
 from pydantic import HttpUrl
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, LargeBinary, Text, DateTime, Enum, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
+from database.enums import DeliveryStatus
 from database.models.base import Base, TimestampMixin
 
 if TYPE_CHECKING:
@@ -14,6 +16,7 @@ if TYPE_CHECKING:
 class GithubRepository(Base, TimestampMixin):
 
     __tablename__ = "gh_repos"
+    __notify_channel__ = "gh_repo_routing"
 
     title: Mapped[str] = mapped_column(String(255), unique=True)
     url: Mapped[str] = mapped_column(String(500))
@@ -33,3 +36,32 @@ class GithubRepository(Base, TimestampMixin):
         if url and not self.title:
             self.title = url.strip().removeprefix("https://github.com/")
         return url
+
+    def notify_payload(self) -> str:
+        # Routing caches are keyed by repository title
+        return self.title
+
+
+class WebhookDelivery(Base, TimestampMixin):
+    """Verified GitHub delivery waiting to be processed by a queue consumer"""
+
+    __tablename__ = "gh_delivery_queue"
+    __table_args__ = (Index("ix_gh_delivery_queue_status_available_at", "status", "available_at"),)
+
+    delivery_id: Mapped[str] = mapped_column(String(64), index=True)
+    event_type: Mapped[str] = mapped_column(String(64))
+    payload: Mapped[bytes] = mapped_column(LargeBinary)
+    status: Mapped[DeliveryStatus] = mapped_column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+
+class SeenDelivery(Base, TimestampMixin):
+    """GitHub delivery GUID that has already been accepted by some worker"""
+
+    __tablename__ = "gh_seen_deliveries"
+    __table_args__ = (Index("ix_gh_seen_deliveries_created_at", "created_at"),)
+
+    delivery_id: Mapped[str] = mapped_column(String(64), unique=True)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database.models.base import Base, TimestampMixin
+
+
+class Lease(Base, TimestampMixin):
+    """Named lock held by one process until it is released or expires"""
+
+    __tablename__ = "leases"
+
+    name: Mapped[str] = mapped_column(String(255), unique=True)
+    holder: Mapped[str] = mapped_column(String(255))
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -1,12 +1,99 @@
-from typing import Optional, Self
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Iterable, NamedTuple, Optional, Self, Sequence
 
+from sqlalchemy import inspect as sa_inspect, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
+# Loads currently in flight in this worker, by model and key
+_inflight: dict[tuple[type, Hashable], asyncio.Future] = {}
+
+# Postgres accepts at most this many bind parameters in one statement
+MAX_BIND_PARAMS = 32767
+
+
+class _Snapshot(NamedTuple):
+    """Column values of a loaded instance, independent of the session it was loaded in"""
+
+    model: type["BaseORMClass"]
+    values: dict[str, Any]
+
+
+def _snapshot(result: Any) -> Any:
+    if isinstance(result, BaseORMClass):
+        mapper = sa_inspect(result).mapper
+        return _Snapshot(type(result), {attr.key: getattr(result, attr.key) for attr in mapper.column_attrs})
+    if isinstance(result, list):
+        return [_snapshot(item) for item in result]
+    return result
+
+
+def _restore(snapshot: Any) -> Any:
+    """Build fresh instances that belong to no session, one set per caller"""
+    if isinstance(snapshot, _Snapshot):
+        return snapshot.model(**snapshot.values)
+    if isinstance(snapshot, list):
+        return [_restore(item) for item in snapshot]
+    return snapshot
+
 
 class BaseORMClass(DeclarativeBase):
     """Base class for ORM models."""
 
+    @classmethod
+    async def coalesce(cls, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Share a single in-flight read between concurrent callers with the same key.
+
+        The first caller runs ``loader`` on its own session. Callers arriving while
+        it runs wait for that result instead of issuing the same query. Every
+        caller, the first one included, gets detached copies of the loaded
+        instances as they were when loaded, so the result is read-only: use a plain
+        ``get`` for a read that precedes a write. Only use it for reads where the
+        result of a concurrent transaction is as good as one's own.
+        """
+        key = (cls, key)
+        future = _inflight.get(key)
+
+        if future is not None:
+            try:
+                snapshot = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled; load on our own unless we were cancelled too
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                snapshot = _snapshot(await loader())
+            return _restore(snapshot)
+
+        future = asyncio.get_running_loop().create_future()
+        _inflight[key] = future
+        try:
+            snapshot = _snapshot(await loader())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it so that a leader without followers does not log "exception never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(snapshot)
+            return _restore(snapshot)
+        finally:
+            del _inflight[key]
+
+    @classmethod
+    async def get_coalesced(cls, session: AsyncSession, **kwargs) -> Optional[Self]:
+        """
+        Get a single record matching the given criteria, sharing concurrent identical lookups.
+
+        The record is a detached, read-only copy; see ``coalesce``.
+        """
+        key = ("get", tuple(sorted(kwargs.items())))
+        return await cls.coalesce(key, lambda: cls.get(session, **kwargs))
+
     @classmethod
     async def get(cls, session: AsyncSession, **kwargs) -> Optional[Self]:
         """Get a single record matching the given criteria."""
@@ -74,3 +161,96 @@ class BaseORMClass(DeclarativeBase):
             session.add(instance)
             await session.flush()
             return instance
+
+    @classmethod
+    async def upsert(
+        cls,
+        session: AsyncSession,
+        values: dict,
+        conflict: Sequence[str],
+        update: Optional[Iterable[str]] = None,
+    ) -> tuple[Self, bool]:
+        """
+        Insert a record or update the conflicting one, in a single statement.
+
+        :param values: Column values of the record
+        :param conflict: Columns of the unique constraint to resolve conflicts on
+        :param update: Columns to overwrite on conflict; all non-conflict ``values``
+            by default, none to keep the existing record as is
+        :return: The record, and whether it was created
+        """
+        # xmax is only zero for a row version that was inserted rather than updated
+        stmt = cls._upsert_statement([values], conflict, update).returning(
+            cls, literal_column("xmax = 0").label("created")
+        )
+        result = await session.execute(stmt, execution_options={"populate_existing": True})
+        instance, created = result.one()
+        return instance, created
+
+    @classmethod
+    async def bulk_create(
+        cls, session: AsyncSession, rows: Sequence[dict], batch_size: Optional[int] = None
+    ) -> list[Self]:
+        """Insert many records with one statement per batch. All rows must have the same keys."""
+        instances = []
+        for batch in cls._batches(rows, batch_size):
+            result = await session.scalars(
+                insert(cls).values(batch).returning(cls), execution_options={"populate_existing": True}
+            )
+            instances.extend(result.all())
+        return instances
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        session: AsyncSession,
+        rows: Sequence[dict],
+        conflict: Sequence[str],
+        update: Optional[Iterable[str]] = None,
+        batch_size: Optional[int] = None,
+    ) -> list[Self]:
+        """
+        Insert or update many records with one statement per batch.
+
+        All rows must have the same keys. When several rows share a conflict key,
+        the last one wins. See ``upsert`` for ``conflict`` and ``update``.
+        """
+        # Postgres refuses to update the same row twice in one statement
+        unique = {tuple(row[column] for column in conflict): row for row in rows}
+
+        instances = []
+        for batch in cls._batches(list(unique.values()), batch_size):
+            result = await session.scalars(
+                cls._upsert_statement(batch, conflict, update).returning(cls),
+                execution_options={"populate_existing": True},
+            )
+            instances.extend(result.all())
+        return instances
+
+    @classmethod
+    def _upsert_statement(cls, rows: list[dict], conflict: Sequence[str], update: Optional[Iterable[str]]):
+        stmt = insert(cls).values(rows)
+        columns = set(rows[0]) - set(conflict) if update is None else set(update)
+
+        if not columns:
+            # A no-op update still returns the existing row, unlike DO NOTHING
+            set_ = {conflict[0]: stmt.excluded[conflict[0]]}
+        else:
+            set_ = {key: stmt.excluded[key] for key in columns}
+            # ON CONFLICT bypasses the ORM, so apply SQL onupdate defaults such as updated_at here
+            for column in cls.__table__.columns:
+                if column.key not in set_ and column.onupdate is not None and column.onupdate.is_clause_element:
+                    set_[column.key] = column.onupdate.arg
+
+        return stmt.on_conflict_do_update(index_elements=list(conflict), set_=set_)
+
+    @classmethod
+    def _batches(cls, rows: Sequence[dict], batch_size: Optional[int]) -> Iterable[list[dict]]:
+        """Split rows into batches that stay under the bind parameter limit"""
+        if not rows:
+            return
+
+        limit = MAX_BIND_PARAMS // len(cls.__table__.columns)
+        size = min(batch_size or limit, limit)
+        for start in range(0, len(rows), size):
+            yield list(rows[start : start + size])
@@ -1,10 +1,12 @@
+from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import BigInteger, String, Enum
+from sqlalchemy import BigInteger, String, Enum, UniqueConstraint, DateTime, Text, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database.models.base import Base, TimestampMixin
-from database.enums import ChatType
+from database.enums import ChatType, DeliveryStatus
 
 if TYPE_CHECKING:
     from database.models.github import GithubRepository
@@ -28,8 +30,43 @@ class Chat(Base, TimestampMixin):
 
         from database.models import GithubRepository
 
-        return await session.scalar(
-            select(cls)
-            .join(cls.repositories)
-            .where(GithubRepository.title == repo_name)
-        )
\ No newline at end of file
+        async def load() -> Optional["Chat"]:
+            return await session.scalar(select(cls).join(cls.repositories).where(GithubRepository.title == repo_name))
+
+        # Deliveries for one repository tend to arrive in bursts
+        return await cls.coalesce(("by_repo", repo_name), load)
+
+
+class MessageThread(Base, TimestampMixin):
+    """Latest bot message of a notification thread in a chat, kept up to date by editing it"""
+
+    __tablename__ = "tg_message_threads"
+    __table_args__ = (UniqueConstraint("chat_id", "thread_key"),)
+
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    thread_key: Mapped[str] = mapped_column(String(512))
+    message_id: Mapped[int] = mapped_column(BigInteger)
+    digest: Mapped[dict] = mapped_column(JSONB)
+    sent_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Bumped by every save, which only applies to the version it was read at
+    version: Mapped[int] = mapped_column(default=0, server_default="0")
+
+
+class OutboxMessage(Base, TimestampMixin):
+    """Rendered notification waiting to be sent to Telegram"""
+
+    __tablename__ = "tg_outbox"
+    __table_args__ = (Index("ix_tg_outbox_status_available_at", "status", "available_at"),)
+
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    text: Mapped[str] = mapped_column(Text)
+    url_buttons: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
+    thread_key: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    digest_type: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    digest: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    status: Mapped[DeliveryStatus] = mapped_column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(default=0)
+    available_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -0,0 +1,79 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.config import async_session_maker
+
+
+class LazySession:
+    """
+    Stand-in for ``AsyncSession`` that creates the real session on first use.
+
+    Handlers that never touch the database never build a session, and the
+    commit/rollback at the end is skipped when nothing was executed or added.
+    Every attribute access is forwarded to the underlying ``AsyncSession``.
+    """
+
+    def __init__(self, factory: async_sessionmaker = async_session_maker) -> None:
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def materialized(self) -> bool:
+        """Whether the underlying session has been created"""
+        return self._session is not None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_session(), name)
+
+    def __contains__(self, instance: object) -> bool:
+        return self._session is not None and instance in self._session
+
+    def __iter__(self):
+        return iter(self._session or ())
+
+    def has_work(self) -> bool:
+        """Whether there is a transaction or pending changes to finish"""
+        session = self._session
+        if session is None:
+            return False
+        return session.in_transaction() or bool(session.new or session.dirty or session.deleted)
+
+    async def finish(self, commit: bool) -> None:
+        """Commit or roll back if anything was done, then close the session"""
+        if self._session is None:
+            return
+
+        try:
+            if self.has_work():
+                if commit:
+                    await self._session.commit()
+                else:
+                    await self._session.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
+
+
+@asynccontextmanager
+async def lazy_session(factory: async_sessionmaker = async_session_maker) -> AsyncIterator[LazySession]:
+    """
+    Provide a lazily created session, committed on success and rolled back on error.
+
+    Usage:
+        async with lazy_session() as session:
+            chat = await Chat.get(session, chat_id=chat_id)
+    """
+    session = LazySession(factory)
+    try:
+        yield session
+    except BaseException:
+        await session.finish(commit=False)
+        raise
+    await session.finish(commit=True)
@@ -8,6 +8,9 @@ from .db import (
 )
 from .server import RunServerCommand, ShellCommand
 from .db_utils import CreateDBCommand, DropDBCommand, ResetDBCommand, ShowTablesCommand
+from .benchmark import BenchmarkModelsCommand
+from .pooler import CheckPoolerCommand
+from .bot import DeleteWebhookCommand, RunSenderCommand
 
 __all__ = [
     "Command",
@@ -23,4 +26,8 @@ __all__ = [
     "DropDBCommand",
     "ResetDBCommand",
     "ShowTablesCommand",
+    "BenchmarkModelsCommand",
+    "CheckPoolerCommand",
+    "DeleteWebhookCommand",
+    "RunSenderCommand",
 ]
@@ -0,0 +1,75 @@
+"""Benchmark commands"""
+
+import sys
+from pathlib import Path
+
+from .base import Command, CommandRegistry
+
+
+@CommandRegistry.register
+class BenchmarkModelsCommand(Command):
+    """Compare full and lean event models on real payloads"""
+
+    name = "benchmark_models"
+    help_text = "Compare validation time and memory of full and lean GitHub event models"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "payloads",
+            nargs="+",
+            help="JSON payloads saved from the webhook's Recent Deliveries page",
+        )
+        parser.add_argument(
+            "-e",
+            "--event",
+            type=str,
+            required=True,
+            help="GitHub event type of the payloads (e.g. push)",
+        )
+        parser.add_argument(
+            "-n",
+            "--iterations",
+            type=int,
+            default=200,
+            help="Validations per measurement (default: 200)",
+        )
+
+    def handle(self, payloads: list[str], event: str, iterations: int = 200, **kwargs) -> None:
+        """Run the benchmark"""
+        import timeit
+        import tracemalloc
+
+        import handlers.github  # noqa: F401 - registers the event handlers
+        from core.decorators import GitHubEventRegistry
+        from core.enums import GHEventType
+
+        try:
+            event_type = GHEventType(event)
+        except ValueError:
+            print(f"❌ Unknown event type: {event}")
+            sys.exit(1)
+
+        models = {
+            "full": GitHubEventRegistry.get_event_model(event_type, lean=False),
+            "lean": GitHubEventRegistry.get_event_model(event_type, lean=True),
+        }
+
+        if models["full"] is models["lean"]:
+            print(f"⚠️  No lean model is registered for {event} events")
+
+        for path in payloads:
+            raw = Path(path).read_bytes()
+            print(f"\n📄 {path} ({len(raw) / 1024:.1f} KiB)")
+
+            for label, model in models.items():
+                timings = timeit.repeat(lambda: model.from_json(raw), number=iterations, repeat=3)
+                per_payload = min(timings) / iterations
+
+                tracemalloc.start()
+                model.from_json(raw)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"  {label}: {per_payload * 1000:8.3f} ms/payload, peak {peak / 1024:8.1f} KiB ({model.__name__})"
+                )
@@ -0,0 +1,67 @@
+"""Telegram bot commands"""
+
+import asyncio
+import sys
+
+from .base import Command, CommandRegistry
+
+
+@CommandRegistry.register
+class DeleteWebhookCommand(Command):
+    """Remove the Telegram webhook"""
+
+    name = "delete_webhook"
+    help_text = "Remove the Telegram webhook (workers never do this on shutdown)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--drop-pending",
+            action="store_true",
+            help="Also drop updates Telegram has queued for the bot",
+        )
+
+    def handle(self, drop_pending: bool = False, **kwargs) -> None:
+        """Delete the webhook"""
+
+        async def delete_webhook():
+            from core.bot import bot
+
+            try:
+                await bot.delete_webhook(drop_pending_updates=drop_pending)
+            finally:
+                await bot.session.close()
+
+        try:
+            asyncio.run(delete_webhook())
+            print("✅ Webhook deleted")
+        except Exception as e:
+            print(f"❌ Error deleting webhook: {e}")
+            sys.exit(1)
+
+
+@CommandRegistry.register
+class RunSenderCommand(Command):
+    """Run the dedicated Telegram sender"""
+
+    name = "runsender"
+    help_text = "Send notifications from the outbox as the single, leader-elected Telegram sender"
+
+    def add_arguments(self, parser) -> None:
+        pass
+
+    def handle(self, **kwargs) -> None:
+        """Run the sender until interrupted"""
+        from config import settings
+
+        if not settings.TG_OUTBOX_ENABLED:
+            print("❌ The sender delivers from the outbox; set TG_OUTBOX_ENABLED=true")
+            sys.exit(1)
+
+        from core.sender import run_sender
+
+        print("📤 Starting Telegram sender...")
+        try:
+            asyncio.run(run_sender())
+        except Exception as e:
+            print(f"❌ Error running sender: {e}")
+            sys.exit(1)
@@ -0,0 +1,118 @@
+"""Connection pooler commands"""
+
+import asyncio
+import sys
+
+from .base import Command, CommandRegistry
+
+
+@CommandRegistry.register
+class CheckPoolerCommand(Command):
+    """Check that the database layer works through a transaction-mode pooler"""
+
+    name = "check_pooler"
+    help_text = "Exercise prepared statements and distributed locks against DATABASE_URL (e.g. PgBouncer)"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Concurrent sessions, more than the pooler's server connections (default: 20)",
+        )
+        parser.add_argument(
+            "-n",
+            "--iterations",
+            type=int,
+            default=50,
+            help="Transactions per session (default: 50)",
+        )
+
+    def handle(self, concurrency: int = 20, iterations: int = 50, **kwargs) -> None:
+        """Run the checks"""
+        from config import settings
+
+        print(
+            f"🔄 Checking {settings.DATABASE_URL.rsplit('@', 1)[-1]} (PgBouncer mode: {settings.DATABASE_PGBOUNCER_MODE})"
+        )
+
+        checks = {
+            "Prepared statements across transactions": lambda: self._check_statements(concurrency, iterations),
+            "Transaction-scoped advisory locks": self._check_advisory_lock,
+            "distributed_lock runs a job once": lambda: self._check_distributed_lock(concurrency),
+        }
+
+        async def run() -> bool:
+            from database import close_db
+
+            passed = True
+            try:
+                for label, check in checks.items():
+                    try:
+                        await check()
+                        print(f"✅ {label}")
+                    except Exception as e:
+                        print(f"❌ {label}: {e}")
+                        passed = False
+            finally:
+                await close_db()
+            return passed
+
+        if not asyncio.run(run()):
+            sys.exit(1)
+
+    @staticmethod
+    async def _check_statements(concurrency: int, iterations: int) -> None:
+        from sqlalchemy import select, literal
+
+        from database import async_session_maker
+
+        async def session_loop(n: int) -> None:
+            for i in range(iterations):
+                # Each transaction may land on a different server connection
+                async with async_session_maker() as session, session.begin():
+                    value = await session.scalar(select(literal(n) + literal(i)))
+                    if value != n + i:
+                        raise AssertionError(f"Expected {n + i}, got {value}")
+
+        await asyncio.gather(*(session_loop(n) for n in range(concurrency)))
+
+    @staticmethod
+    async def _check_advisory_lock() -> None:
+        from sqlalchemy import text
+
+        from database import async_session_maker
+
+        lock = text("SELECT pg_try_advisory_xact_lock(:lock_id)")
+        lock_id = 0x6768_7762  # Arbitrary ID reserved for this check
+
+        async with async_session_maker() as holder, async_session_maker() as contender:
+            async with holder.begin():
+                if not await holder.scalar(lock, {"lock_id": lock_id}):
+                    raise AssertionError("Could not acquire a free lock")
+
+                async with contender.begin():
+                    if await contender.scalar(lock, {"lock_id": lock_id}):
+                        raise AssertionError("Lock was acquired twice")
+
+            # Committing the holder's transaction must release the lock
+            async with contender.begin():
+                if not await contender.scalar(lock, {"lock_id": lock_id}):
+                    raise AssertionError("Lock was not released at the end of the transaction")
+
+    @staticmethod
+    async def _check_distributed_lock(concurrency: int) -> None:
+        from core.decorators import distributed_lock
+
+        runs = 0
+
+        @distributed_lock("check_pooler")
+        async def job() -> None:
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.5)
+
+        await asyncio.gather(*(job() for _ in range(concurrency)))
+        if runs != 1:
+            raise AssertionError(f"Job ran {runs} times")
@@ -17,7 +17,7 @@ async def handle_connect_repo(message: Message, repo_url: str, session: AsyncSes
 
     msg = await message.answer("🔗 Connecting chat to repository...")
 
-    # Check if this repository ever pinged via webhook
+    # Check if this repository ever pinged via webhook; not coalesced, as it may be updated below
     repo = await GithubRepository.get(
         session=session,
         url=repo_url,
@@ -29,14 +29,16 @@ async def handle_connect_repo(message: Message, repo_url: str, session: AsyncSes
         )
         return
 
-    # Create chat instance if not exists
-    chat, _ = await Chat.get_or_create(
+    # Create chat instance if not exists, keeping its title up to date
+    chat, _ = await Chat.upsert(
         session=session,
-        chat_id=message.chat.id,
-        defaults={
+        values={
+            "chat_id": message.chat.id,
             "chat_type": ChatType(message.chat.type),
             "title": message.chat.title or message.chat.full_name,
         },
+        conflict=["chat_id"],
+        update=["title"],
     )
 
     if not repo.chat_id:
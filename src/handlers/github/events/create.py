@@ -3,24 +3,24 @@ from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core import get_logger
-from core.bot import bot
 from core.decorators import GitHubEventRegistry
 from core.enums import GHEventType
-from core.utils.bot import send_message
-from database.models import Chat
+from core.routing import routing_cache
+from core.utils.bot import Notification
 from handlers.github.models.events import CreateEvent
+from handlers.github.models.lean import LeanCreateEvent
 
 logger = get_logger(__name__)
 
 
-@GitHubEventRegistry.register(event=GHEventType.CREATE)
-async def handle(event: CreateEvent, session: AsyncSession) -> None:
+@GitHubEventRegistry.register(event=GHEventType.CREATE, lean_model=LeanCreateEvent)
+async def handle(event: CreateEvent, session: AsyncSession) -> Optional[Notification]:
     """Handle GitHub create events"""
 
     # Get the chat ID associated with the repository
-    chat_id = await _get_chat_id(repo_name=event.repository.full_name, session=session)
+    chat_id = await routing_cache.get_chat_id(session, event.repository.full_name)
     if not chat_id:
-        return
+        return None
 
     logger.info("Handling create event for repository: %s", event.repository.full_name)
 
@@ -28,26 +28,13 @@ async def handle(event: CreateEvent, session: AsyncSession) -> None:
     message = await _build_create_message(event=event)
     buttons = await _build_inline_buttons(event=event)
 
-    await send_message(
-        bot=bot,
+    return Notification(
         chat_id=chat_id,
         text=message,
         url_buttons=buttons,
     )
 
 
-async def _get_chat_id(repo_name: str, session: AsyncSession) -> Optional[int]:
-    """Get the chat ID associated with the given repository name"""
-
-    chat = await Chat.get_by_repo(session, repo_name)
-
-    if not chat:
-        logger.error("Failed to get chat ID for repository %s", repo_name)
-        return None
-
-    return chat.chat_id
-
-
 async def _build_create_message(event: CreateEvent) -> str:
     """Build a notification message for the create event"""
 
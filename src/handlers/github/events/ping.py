@@ -1,50 +1,54 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.bot import bot
 from core.decorators import GitHubEventRegistry, logger
 from core.enums import GHEventType
-from core.utils.bot import send_message
+from core.utils.bot import Notification
 from database.models import Chat, GithubRepository
 from handlers.github.models.events import PingEvent
+from handlers.github.models.lean import LeanPingEvent
 
 
-@GitHubEventRegistry.register(event=GHEventType.PING)
-async def handle(event: PingEvent, session: AsyncSession) -> None:
+@GitHubEventRegistry.register(event=GHEventType.PING, lean_model=LeanPingEvent)
+async def handle(event: PingEvent, session: AsyncSession) -> Optional[Notification]:
     """Handle GitHub ping events"""
 
     logger.info(f"Received ping event for repository: {event.repository.full_name}")
 
-    repo, created = await GithubRepository.get_or_create(
+    repo, created = await GithubRepository.upsert(
         session=session,
-        title=event.repository.full_name,
-        defaults={
-            "url": event.repository.html_url,
+        values={
+            "title": event.repository.full_name,
+            "url": str(event.repository.html_url).rstrip("/"),
             "chat_id": None,
         },
+        conflict=["title"],
+        update=(),
     )
 
     if created:
+        await repo.notify_change(session)
         logger.info(f"Registered new repository from ping event: {repo.title}")
-        return
+        return None
 
     # Check if repository has an associated chat
     if repo.chat_id is None:
         logger.warning(f"Repository {repo.title} has no associated chat ID")
-        return
+        return None
 
     # Get the chat associated with the repository
-    chat = await Chat.get(session, id=repo.chat_id)
+    chat = await Chat.get_coalesced(session, id=repo.chat_id)
 
     if chat is None:
         logger.error(f"Chat with ID {repo.chat_id} not found for repository {repo.title}")
-        return
+        return None
 
     # Build the commit message and inline buttons
     message = await _build_commit_message(event)
     buttons = await _build_inline_buttons(event)
 
-    await send_message(
-        bot=bot,
+    return Notification(
         chat_id=chat.chat_id,
         text=message,
         url_buttons=buttons,
@@ -1,101 +1,143 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core import get_logger
-from core.bot import bot
 from core.decorators import GitHubEventRegistry
 from core.enums import GHEventType
-from core.utils.bot import send_message
-from database.models import Chat
+from core.routing import routing_cache
+from core.utils.bot import Digest, Notification
 from handlers.github.models.events import PushEvent
+from handlers.github.models.lean import LeanPushEvent
 
 logger = get_logger(__name__)
 
 
-@GitHubEventRegistry.register(event=GHEventType.PUSH)
-async def handle(event: PushEvent, session: AsyncSession) -> None:
+@GitHubEventRegistry.register(event=GHEventType.PUSH, lean_model=LeanPushEvent)
+async def handle(event: PushEvent, session: AsyncSession) -> Optional[Notification]:
     """Handle GitHub push events"""
 
     # Skip deleted or created refs
     if any([event.deleted, event.created]):
-        return
+        return None
 
     # Get the chat ID associated with the repository
-    chat_id = await _get_chat_id(repo_name=event.repository.full_name, session=session)
+    chat_id = await routing_cache.get_chat_id(session, event.repository.full_name)
     if not chat_id:
-        return
+        return None
 
     logger.info("Handling push event for repository: %s", event.repository.full_name)
 
-    # Build the commit message and inline buttons
-    message = await _build_commit_message(event=event)
-    buttons = await _build_inline_buttons(event=event)
+    digest = _build_digest(event=event)
+    message, buttons = digest.render()
 
-    await send_message(
-        bot=bot,
+    return Notification(
         chat_id=chat_id,
         text=message,
         url_buttons=buttons,
+        thread_key=f"push:{event.repository.full_name}:{event.ref}",
+        digest=digest,
     )
 
-async def _get_chat_id(repo_name: str, session: AsyncSession) -> Optional[int]:
-    """Get the chat ID associated with the given repository name"""
-
-    chat = await Chat.get_by_repo(session, repo_name)
-
-    if not chat:
-        logger.error("Failed to get chat ID for repository %s", repo_name)
-        return None
-
-    return chat.chat_id
-
-
-async def _build_commit_message(event: PushEvent) -> str:
-    """Build a summary message for the commits in the push event"""
 
-    # Build the push notification message
-    commit_count = len(event.commits)
-    branch_or_tag = "🏷 Tag" if event.is_tag else "🌿 Branch"
-
-    # Build commit details (show up to 3 commits)
-    commit_details = []
-    for commit in event.commits[commit_count - 3:]:
-        # Get first line of commit message
-        commit_msg = commit.message.split("\n")[0]
-        if len(commit_msg) > 60:
-            commit_msg = commit_msg[:57] + "..."
-
-        # Show files changed summary
-        commit_details.append(f"  • <a href='{commit.url}'>{commit_msg}</a>")
-
-    total_added, total_removed, total_modified = 0, 0, 0
-    for commit in event.commits:
-        total_added += len(commit.added)
-        total_removed += len(commit.removed)
-        total_modified += len(commit.modified)
-
-    commits_text = "\n".join(reversed(commit_details))
-
-    # Add "and X more" if there are more commits
-    more_commits = ""
-    if commit_count > 3:
-        more_commits = f"\n\n<i>... and {commit_count - 3} more commit{'s' if commit_count - 3 != 1 else ''}</i>"
-
-    message = (
-        f"🚀 <b>Push to <a href='{event.repository.html_url}'>{event.repository.full_name}</a></b>\n"
-        f"{branch_or_tag}: <a href='{event.ref_url}'>{event.ref_name}</a>\n"
-        f"👤 Pusher: <a href='{event.sender.html_url}'>{event.sender.login}</a>\n"
-        f"📝 {commit_count} commit{'s' if commit_count != 1 else ''} [+{total_added} / -{total_removed} / ~{total_modified}]\n\n"
-        f"{commits_text}"
-        f"{more_commits}"
+class PushDigest(Digest):
+    """Facts of one or more consecutive pushes to the same ref"""
+
+    repo_name: str
+    repo_url: str
+    ref_name: str
+    ref_url: str
+    is_tag: bool
+    pushers: List[Tuple[str, str]]
+    pushes: int = 1
+    commit_count: int
+    total_added: int
+    total_removed: int
+    total_modified: int
+    commits: List[Tuple[str, str]]  # Latest commits as (url, message), oldest first
+    compare_url: str
+
+    def merge(self, other: "PushDigest") -> "PushDigest":
+        """Combine with the digest of a later push to the same ref"""
+        pushers = self.pushers + [pusher for pusher in other.pushers if pusher not in self.pushers]
+
+        return self.model_copy(
+            update={
+                "pushers": pushers,
+                "pushes": self.pushes + other.pushes,
+                "commit_count": self.commit_count + other.commit_count,
+                "total_added": self.total_added + other.total_added,
+                "total_removed": self.total_removed + other.total_removed,
+                "total_modified": self.total_modified + other.total_modified,
+                "commits": (self.commits + other.commits)[-3:],
+                "compare_url": _merge_compare_urls(self.compare_url, other.compare_url),
+            }
+        )
+
+    def render(self) -> Tuple[str, List[Tuple[str, str]]]:
+        """Build the summary message and inline buttons"""
+
+        commit_count = self.commit_count
+        branch_or_tag = "🏷 Tag" if self.is_tag else "🌿 Branch"
+
+        # Build commit details (show up to 3 commits)
+        commit_details = []
+        for url, message in self.commits[-3:]:
+            # Get first line of commit message
+            commit_msg = message.split("\n")[0]
+            if len(commit_msg) > 60:
+                commit_msg = commit_msg[:57] + "..."
+
+            commit_details.append(f"  • <a href='{url}'>{commit_msg}</a>")
+
+        commits_text = "\n".join(reversed(commit_details))
+
+        # Add "and X more" if there are more commits
+        more_commits = ""
+        if commit_count > 3:
+            more_commits = f"\n\n<i>... and {commit_count - 3} more commit{'s' if commit_count - 3 != 1 else ''}</i>"
+
+        title = "Push" if self.pushes == 1 else f"{self.pushes} pushes"
+        pushers = ", ".join(f"<a href='{url}'>{login}</a>" for login, url in self.pushers)
+
+        message = (
+            f"🚀 <b>{title} to <a href='{self.repo_url}'>{self.repo_name}</a></b>\n"
+            f"{branch_or_tag}: <a href='{self.ref_url}'>{self.ref_name}</a>\n"
+            f"👤 Pusher{'s' if len(self.pushers) > 1 else ''}: {pushers}\n"
+            f"📝 {commit_count} commit{'s' if commit_count != 1 else ''} "
+            f"[+{self.total_added} / -{self.total_removed} / ~{self.total_modified}]\n\n"
+            f"{commits_text}"
+            f"{more_commits}"
+        )
+
+        return message, [("📊 View Changes", self.compare_url)]
+
+
+def _build_digest(event: PushEvent) -> PushDigest:
+    """Collect the facts of the push event that its message shows"""
+
+    return PushDigest(
+        repo_name=event.repository.full_name,
+        repo_url=str(event.repository.html_url),
+        ref_name=event.ref_name,
+        ref_url=str(event.ref_url),
+        is_tag=event.is_tag,
+        pushers=[(event.sender.login, str(event.sender.html_url))],
+        commit_count=event.commit_count,
+        total_added=event.total_added,
+        total_removed=event.total_removed,
+        total_modified=event.total_modified,
+        commits=[(str(commit.url), commit.message) for commit in event.commits[-3:]],
+        compare_url=str(event.compare),
     )
 
-    return message
 
-async def _build_inline_buttons(event: PushEvent):
-    """Build inline URL buttons for the push event"""
+def _merge_compare_urls(first: str, last: str) -> str:
+    """Compare URL spanning from the base of the first push to the head of the last one"""
+
+    base, separator, first_range = first.rpartition("/compare/")
+    _, _, last_range = last.rpartition("/compare/")
+    if not separator or "..." not in first_range or "..." not in last_range:
+        return last
 
-    return [
-        ("📊 View Changes", str(event.compare)),
-    ]
+    return f"{base}/compare/{first_range.split('...')[0]}...{last_range.split('...')[-1]}"
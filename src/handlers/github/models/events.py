@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Self
 from pydantic import HttpUrl
 
 from handlers.github.models.shared import User, Repository, Commit, Pusher, Hook
@@ -9,7 +9,85 @@ from handlers.github.models.shared import User, Repository, Commit, Pusher, Hook
 class BaseEvent(BaseModel):
     """Base model for GitHub events"""
 
-    pass
+    @classmethod
+    def from_json(cls, data: bytes | str) -> Self:
+        """Validate the event straight from a raw JSON payload"""
+        return cls.model_validate_json(data)
+
+
+class PushRefMixin:
+    """Ref helpers for events that carry a fully qualified ``ref``"""
+
+    @property
+    def is_tag(self) -> bool:
+        """Check if this is a tag push event"""
+        return self.ref.startswith("refs/tags/")
+
+    @property
+    def is_branch(self) -> bool:
+        """Check if this is a branch push event"""
+        return self.ref.startswith("refs/heads/")
+
+    @property
+    def ref_name(self) -> str:
+        """Extract the tag or branch name from the ref"""
+        if self.is_tag:
+            return self.ref.replace("refs/tags/", "")
+        elif self.is_branch:
+            return self.ref.replace("refs/heads/", "")
+        return self.ref
+
+    @property
+    def ref_url(self) -> HttpUrl:
+        """Get the URL to the branch or tag in the repository"""
+        if self.is_tag:
+            return HttpUrl(f"{self.repository.html_url}/tree/{self.ref_name}")
+        elif self.is_branch:
+            return HttpUrl(f"{self.repository.html_url}/tree/{self.ref_name}")
+        return self.repository.html_url
+
+
+class CommitStatsMixin:
+    """Commit statistics for events that carry the full ``commits`` list"""
+
+    @property
+    def commit_count(self) -> int:
+        """Number of commits in the push"""
+        return len(self.commits)
+
+    @property
+    def total_added(self) -> int:
+        """Number of files added across all commits"""
+        return sum(len(commit.added) for commit in self.commits)
+
+    @property
+    def total_removed(self) -> int:
+        """Number of files removed across all commits"""
+        return sum(len(commit.removed) for commit in self.commits)
+
+    @property
+    def total_modified(self) -> int:
+        """Number of files modified across all commits"""
+        return sum(len(commit.modified) for commit in self.commits)
+
+
+class RefTypeMixin:
+    """Ref helpers for events that carry a short ``ref`` and a ``ref_type``"""
+
+    @property
+    def is_tag(self) -> bool:
+        """Check if this event refers to a tag"""
+        return self.ref_type == "tag"
+
+    @property
+    def is_branch(self) -> bool:
+        """Check if this event refers to a branch"""
+        return self.ref_type == "branch"
+
+    @property
+    def ref_name(self) -> str:
+        """Get the name of the tag or branch"""
+        return self.ref
 
 
 class PingEvent(BaseEvent):
@@ -25,7 +103,7 @@ class PingEvent(BaseEvent):
     sender: User
 
 
-class PushEvent(BaseEvent):
+class PushEvent(PushRefMixin, CommitStatsMixin, BaseEvent):
     """
     Main model for GitHub push webhook events
     Triggered when a Git branch or tag is pushed
@@ -48,36 +126,8 @@ class PushEvent(BaseEvent):
     deleted: bool
     forced: bool
 
-    @property
-    def is_tag(self) -> bool:
-        """Check if this is a tag push event"""
-        return self.ref.startswith("refs/tags/")
-
-    @property
-    def is_branch(self) -> bool:
-        """Check if this is a branch push event"""
-        return self.ref.startswith("refs/heads/")
 
-    @property
-    def ref_name(self) -> str:
-        """Extract the tag or branch name from the ref"""
-        if self.is_tag:
-            return self.ref.replace("refs/tags/", "")
-        elif self.is_branch:
-            return self.ref.replace("refs/heads/", "")
-        return self.ref
-
-    @property
-    def ref_url(self) -> HttpUrl:
-        """Get the URL to the branch or tag in the repository"""
-        if self.is_tag:
-            return HttpUrl(f"{self.repository.html_url}/tree/{self.ref_name}")
-        elif self.is_branch:
-            return HttpUrl(f"{self.repository.html_url}/tree/{self.ref_name}")
-        return self.repository.html_url
-
-
-class CreateEvent(BaseEvent):
+class CreateEvent(RefTypeMixin, BaseEvent):
     """
     GitHub create webhook event
     Triggered when a Git branch or tag is created
@@ -93,23 +143,8 @@ class CreateEvent(BaseEvent):
     repository: Repository
     sender: User
 
-    @property
-    def is_tag(self) -> bool:
-        """Check if this event created a tag"""
-        return self.ref_type == "tag"
-
-    @property
-    def is_branch(self) -> bool:
-        """Check if this event created a branch"""
-        return self.ref_type == "branch"
-
-    @property
-    def ref_name(self) -> str:
-        """Get the name of the created tag or branch"""
-        return self.ref
-
 
-class DeleteEvent(BaseEvent):
+class DeleteEvent(RefTypeMixin, BaseEvent):
     """
     GitHub delete webhook event
     Triggered when a Git branch or tag is deleted
@@ -121,18 +156,3 @@ class DeleteEvent(BaseEvent):
     pusher_type: Literal["user", "deploy_key"]
     repository: Repository
     sender: User
-
-    @property
-    def is_tag(self) -> bool:
-        """Check if this event deleted a tag"""
-        return self.ref_type == "tag"
-
-    @property
-    def is_branch(self) -> bool:
-        """Check if this event deleted a branch"""
-        return self.ref_type == "branch"
-
-    @property
-    def ref_name(self) -> str:
-        """Get the name of the deleted tag or branch"""
-        return self.ref
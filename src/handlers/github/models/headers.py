@@ -13,7 +13,7 @@ class WebhookHeaders(BaseModel):
     hook_id: str = Field(..., alias="X-GitHub-Hook-ID")
     event_type: GHEventType = Field(..., alias="X-GitHub-Event")
     delivery: str = Field(..., alias="X-GitHub-Delivery")
-    signature: str = Field(default=None, alias="X-Hub-Signature-256")
+    signature: Optional[str] = Field(default=None, alias="X-Hub-Signature-256")
     user_agent: str = Field(..., alias="User-Agent")
     target_type: str = Field(..., alias="X-GitHub-Hook-Installation-Target-Type")
     target_id: str = Field(..., alias="X-GitHub-Hook-Installation-Target-ID")
@@ -31,6 +31,30 @@ class WebhookHeaders(BaseModel):
 
         return GitHubEventRegistry.get_handler(event=self.event_type)
 
+    def verify_signature(self, body: bytes, secrets: list[str]) -> bool:
+        """Verify the ``X-Hub-Signature-256`` header against the raw request body.
+
+        Every configured secret is tried so that deliveries signed with either the
+        old or the new secret are accepted while a rotation is in progress.
+
+        :param body: Raw request body, exactly as received
+        :param secrets: Active webhook secrets
+        :return: True if the signature matches one of the secrets
+        """
+        import hashlib
+        import hmac
+
+        if not self.signature or not self.signature.startswith("sha256="):
+            return False
+
+        signature = self.signature.removeprefix("sha256=")
+        for secret in secrets:
+            expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+            if hmac.compare_digest(expected, signature):
+                return True
+
+        return False
+
     async def extract_payload(self, request: Request) -> dict:
         """Extract payload from the request based on content type.
 
@@ -52,3 +76,30 @@ class WebhookHeaders(BaseModel):
                 raise HTTPException(status_code=400, detail="Invalid payload")
 
         raise HTTPException(status_code=400, detail="Payload not found")
+
+    async def extract_raw_payload(self, request: Request) -> bytes | str:
+        """Extract the raw JSON document from the request without decoding it.
+
+        The body is read once as bytes so that it can be validated directly
+        with ``model_validate_json`` instead of being parsed into a dict first.
+
+        :param request: FastAPI Request object
+        :return: Raw JSON payload
+        :raises HTTPException: If payload extraction fails
+        """
+        from urllib.parse import parse_qs
+
+        body = await request.body()
+
+        match self.content_type:
+            case ContentType.JSON:
+                if body:
+                    return body
+            case ContentType.FORM_URLENCODED:
+                payload_str = parse_qs(body.decode()).get("payload")
+                if payload_str:
+                    return payload_str[0]
+            case _:
+                raise HTTPException(status_code=400, detail="Invalid payload")
+
+        raise HTTPException(status_code=400, detail="Payload not found")
@@ -0,0 +1,108 @@
+"""
+Projection models for GitHub events.
+
+They declare only the fields the event handlers read. Pydantic ignores every
+other key of the payload, so the dozens of URL and datetime fields on
+``Repository``, ``User`` and ``Commit`` are skipped instead of validated.
+"""
+
+from typing import Any, ClassVar, List, Literal, Optional, Self
+
+from pydantic import BaseModel, model_validator
+
+from handlers.github.models.events import BaseEvent, PushRefMixin, RefTypeMixin
+from handlers.github.models.streaming import FILE_LISTS, decode_push_payload
+
+
+class UserRef(BaseModel):
+    """Projection of a GitHub user"""
+
+    login: str
+    html_url: str
+
+
+class RepositoryRef(BaseModel):
+    """Projection of a GitHub repository"""
+
+    full_name: str
+    html_url: str
+
+
+class CommitRef(BaseModel):
+    """Projection of a commit in a push event"""
+
+    id: str
+    url: str
+    message: str
+
+
+class LeanPingEvent(BaseEvent):
+    """Projection of ``PingEvent``"""
+
+    repository: RepositoryRef
+    sender: UserRef
+
+
+class LeanPushEvent(PushRefMixin, BaseEvent):
+    """
+    Projection of ``PushEvent``
+
+    Only the last ``commit_window`` commits are kept; the file lists of all
+    commits are reduced to totals while the payload is being decoded.
+    """
+
+    commit_window: ClassVar[int] = 3
+
+    ref: str
+    compare: str
+    commits: List[CommitRef]
+    commit_count: int
+
+    total_added: int
+    total_removed: int
+    total_modified: int
+
+    repository: RepositoryRef
+    sender: UserRef
+
+    created: bool
+    deleted: bool
+
+    @classmethod
+    def from_json(cls, data: bytes | str) -> Self:
+        """Validate the event with the streaming push decoder"""
+        return cls.model_validate(decode_push_payload(data, window=cls.commit_window))
+
+    @model_validator(mode="before")
+    @classmethod
+    def summarize_commits(cls, data: Any) -> Any:
+        """Reduce a fully decoded ``commits`` list the same way the streaming decoder does"""
+        if not isinstance(data, dict) or "commit_count" in data:
+            return data
+
+        commits = data.get("commits") or []
+        data = {**data, "commits": commits[-cls.commit_window :], "commit_count": len(commits)}
+        for key in FILE_LISTS:
+            data[f"total_{key}"] = sum(len(commit.get(key) or ()) for commit in commits)
+        return data
+
+
+class LeanCreateEvent(RefTypeMixin, BaseEvent):
+    """Projection of ``CreateEvent``"""
+
+    ref: str
+    ref_type: Literal["tag", "branch"]
+    description: Optional[str] = None
+
+    repository: RepositoryRef
+    sender: UserRef
+
+
+class LeanDeleteEvent(RefTypeMixin, BaseEvent):
+    """Projection of ``DeleteEvent``"""
+
+    ref: str
+    ref_type: Literal["tag", "branch"]
+
+    repository: RepositoryRef
+    sender: UserRef
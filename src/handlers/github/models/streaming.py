@@ -0,0 +1,204 @@
+"""
+Memory-bounded decoder for push payloads.
+
+A push can carry up to 2048 commits, each with its own file lists. Instead of
+materializing the whole document, the decoder walks the top-level object and
+the ``commits`` array over the raw bytes. Each commit's ``added``, ``removed``
+and ``modified`` arrays are only counted by a scanner that matches their strings
+without creating them; the commit's other members are decoded with the C JSON
+parser. A commit is dropped right after it is tallied unless it is one of the
+last few, so no per-file string is ever allocated.
+
+Values are located by skipping over their text and then decoded from a slice
+of just that value, so the body is never copied as a whole.
+"""
+
+import re
+from collections import deque
+from json import JSONDecoder
+from typing import Any
+
+FILE_LISTS = ("added", "removed", "modified")
+
+_WS = rb"[ \t\n\r]*+"
+# A JSON string, matched without decoding it
+_STRING = rb'"[^"\\\x00-\x1f]*+(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*+)*+"'
+# Anything up to the next bracket outside a string
+_FLAT = rb'[^"\[\]{}]*+(?:"[^"\\]*+(?:\\.[^"\\]*+)*+"[^"\[\]{}]*+)*+'
+# A value of a commit member: a string, a scalar, or an object or array of such values
+_VALUE = rb"(?:%s|[-+.0-9a-zA-Z]++|[\[{]%s[\]}])" % (_STRING, _FLAT)
+# A file list member holding only strings, its array captured in a group named after it
+_FILE_LIST = rb'"%s"{ws}:{ws}(?P<%s>\[{ws}(?:{string}{ws}(?:,{ws}{string}{ws})*+)?\])'
+_FILE_LIST = _FILE_LIST.replace(b"{ws}", _WS).replace(b"{string}", _STRING)
+_MEMBER = b"|".join(
+    [*(_FILE_LIST % (key.encode(), key.encode()) for key in FILE_LISTS), _STRING + _WS + b":" + _WS + _VALUE]
+)
+
+_WHITESPACE = re.compile(_WS)
+_STRING_RE = re.compile(_STRING)
+_FLAT_RE = re.compile(_FLAT, re.DOTALL)
+_SCALAR_END = re.compile(rb"[^,\]}]*+")
+_decoder = JSONDecoder()
+
+# A commit object locating its file lists in one pass; commas are left to the decoder to check
+_COMMIT = re.compile(rb"\{(?:%s,?%s(?:%s))*+%s\}" % (_WS, _WS, _MEMBER, _WS), re.DOTALL)
+
+
+def decode_push_payload(data: bytes | str, window: int) -> dict:
+    """
+    Decode a push payload, keeping only the last ``window`` commits.
+
+    The returned dict has the top-level members of the payload, with ``commits``
+    reduced to the kept commits (without their file lists) and the
+    ``commit_count``, ``total_added``, ``total_removed`` and ``total_modified``
+    tallies added. A form-encoded payload, already a ``str``, is encoded first.
+
+    :raises ValueError: If the payload is not a valid JSON object
+    """
+    s = data.encode() if isinstance(data, str) else data
+
+    try:
+        payload, pos = _decode_top_level(s, window)
+    except IndexError:
+        raise ValueError("Unexpected end of JSON payload")
+
+    if _skip(s, pos) != len(s):
+        raise ValueError(f"Extra data at position {pos}")
+
+    return payload
+
+
+def _skip(s: bytes, pos: int) -> int:
+    return _WHITESPACE.match(s, pos).end()
+
+
+def _expect(s: bytes, pos: int, char: bytes) -> int:
+    if s[pos : pos + 1] != char:
+        raise ValueError(f"Expected {char.decode()!r} at position {pos}")
+    return _skip(s, pos + 1)
+
+
+def _key(s: bytes, pos: int) -> tuple[str, int]:
+    """Decode the property name at ``pos`` and skip the colon after it"""
+    match = _STRING_RE.match(s, pos)
+    if match is None:
+        raise ValueError(f"Expected property name at position {pos}")
+    return _loads(match[0]), _expect(s, _skip(s, match.end()), b":")
+
+
+def _value_end(s: bytes, pos: int) -> int:
+    """Position right after the value at ``pos``, found without decoding it"""
+    opening = s[pos : pos + 1]
+    if opening == b'"':
+        match = _STRING_RE.match(s, pos)
+        if match is None:
+            raise ValueError(f"Invalid string at position {pos}")
+        return match.end()
+    if opening not in (b"{", b"["):
+        return _SCALAR_END.match(s, pos).end()
+
+    depth = 0
+    while True:
+        char = s[pos]
+        depth += 1 if char in b"{[" else -1
+        pos += 1
+        if depth == 0:
+            return pos
+        pos = _FLAT_RE.match(s, pos).end()
+
+
+def _loads(text: bytes) -> Any:
+    return _decoder.decode(text.decode())
+
+
+def _decode_value(s: bytes, pos: int) -> tuple[Any, int]:
+    end = _value_end(s, pos)
+    return _loads(s[pos:end]), end
+
+
+def _decode_top_level(s: bytes, window: int) -> tuple[dict, int]:
+    """Decode the payload object, streaming its ``commits`` member"""
+    payload = {}
+    pos = _expect(s, _skip(s, 0), b"{")
+    if s[pos : pos + 1] == b"}":
+        return payload, pos + 1
+
+    while True:
+        key, pos = _key(s, pos)
+        if key == "commits":
+            summary, pos = _decode_commits(s, pos, window)
+            payload.update(summary)
+        else:
+            payload[key], pos = _decode_value(s, pos)
+
+        pos = _skip(s, pos)
+        if s[pos : pos + 1] == b"}":
+            return payload, pos + 1
+        pos = _expect(s, pos, b",")
+
+
+def _count_strings(s: bytes, start: int, end: int) -> int:
+    """Number of strings in the array of strings between ``start`` and ``end``"""
+    if s.find(b"\\", start, end) == -1:
+        # Without escapes every quote opens or closes a string
+        return s.count(b'"', start, end) // 2
+    return sum(1 for _ in _STRING_RE.finditer(s, start, end))
+
+
+def _decode_commit(s: bytes, pos: int, totals: dict[str, int]) -> tuple[dict, int]:
+    """
+    Decode the commit object at ``pos``, adding the sizes of its file lists to ``totals``.
+
+    The file lists are located by ``_COMMIT``, counted in place and cut out of the
+    text that is decoded. A commit it does not match, e.g. one nested deeper than
+    usual, is decoded whole.
+    """
+    match = _COMMIT.match(s, pos)
+    if match is None:
+        return _decode_value(s, pos)
+
+    pieces = []
+    for start, end, key in sorted((match.start(key), match.end(key), key) for key in FILE_LISTS):
+        if start == -1:
+            continue
+        totals[key] += _count_strings(s, start, end)
+        pieces.append(s[pos:start])
+        pieces.append(b"null")
+        pos = end
+    pieces.append(s[pos : match.end()])
+
+    return _loads(b"".join(pieces)), match.end()
+
+
+def _decode_commits(s: bytes, pos: int, window: int) -> tuple[dict[str, Any], int]:
+    """Tally the ``commits`` array at ``pos`` one commit at a time"""
+    commits = deque(maxlen=window)
+    totals = dict.fromkeys(FILE_LISTS, 0)
+    count = 0
+
+    pos = _expect(s, pos, b"[")
+    if s[pos : pos + 1] == b"]":
+        pos += 1
+    else:
+        while True:
+            if s[pos : pos + 1] != b"{":
+                raise ValueError(f"Expected commit object at position {pos}")
+            commit, pos = _decode_commit(s, pos, totals)
+
+            count += 1
+            for key in FILE_LISTS:
+                # Lists that are not just strings were decoded after all
+                totals[key] += len(commit.pop(key, None) or ())
+            commits.append(commit)
+
+            pos = _skip(s, pos)
+            if s[pos : pos + 1] == b"]":
+                pos += 1
+                break
+            pos = _expect(s, pos, b",")
+
+    summary = {"commits": list(commits), "commit_count": count}
+    for key in FILE_LISTS:
+        summary[f"total_{key}"] = totals[key]
+
+    return summary, pos
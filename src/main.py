@@ -7,6 +7,8 @@ from core.bot import init_bot, shutdown_bot
 from core import get_logger
 from config import settings
 from core.server import start_fastapi_server
+from core.services import start_services, stop_services
+from database import close_db
 
 logger = get_logger(__name__)
 
@@ -29,6 +31,7 @@ async def main():
         # If webhook mode, start FastAPI server
         if settings.USE_WEBHOOK:
             logger.info("Starting in webhook mode with FastAPI server")
+            await start_services()
             await start_fastapi_server()
         else:
             logger.info("Running in polling mode (FastAPI server not started)")
@@ -46,9 +49,15 @@ async def shutdown():
 
     logger.info("Initiating shutdown...")
 
+    # Stop background services while the bot can still send
+    if settings.USE_WEBHOOK:
+        await stop_services()
+
     # Shutdown the bot
     await shutdown_bot()
 
+    await close_db()
+
     # Cancel server task if running
     if server_task and not server_task.done():
         server_task.cancel()
@@ -0,0 +1,161 @@
+"""
+The coalescer against an in-memory outbox.
+
+Buffered notifications must be held in the outbox until they are sent, so that
+a worker dying with them buffered does not lose them.
+"""
+
+import asyncio
+from typing import Self
+
+import pytest
+
+from core import coalesce
+from core.coalesce import HOLD_GRACE, NotificationCoalescer
+from core.ratelimit import RateLimitExceeded
+from core.utils.bot import Digest, Notification
+
+
+class CountDigest(Digest):
+    count: int
+
+    def merge(self, other: Self) -> Self:
+        return CountDigest(count=self.count + other.count)
+
+    def render(self):
+        return f"{self.count} events", None
+
+
+class FakeOutbox:
+    def __init__(self) -> None:
+        self.rows: dict[int, dict] = {}
+        self.deferred: list[Notification] = []
+
+    async def hold(self, notification: Notification, delay: float) -> int:
+        message_id = len(self.rows) + 1
+        self.rows[message_id] = {"notification": notification, "delay": delay, "status": "pending"}
+        return message_id
+
+    async def claim_held(self, ids: list[int]) -> list[int]:
+        claimed = [i for i in ids if self.rows[i]["status"] == "pending"]
+        for i in claimed:
+            self.rows[i]["status"] = "processing"
+        return claimed
+
+    async def release(self, ids: list[int]) -> None:
+        for i in ids:
+            self.rows[i].update(status="pending", delay=0)
+
+    async def delete(self, ids: list[int]) -> None:
+        for i in ids:
+            del self.rows[i]
+
+    async def defer(self, notification: Notification) -> None:
+        self.deferred.append(notification)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    outbox = FakeOutbox()
+    monkeypatch.setattr(coalesce, "notification_outbox", outbox)
+    return outbox
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+
+    async def send_notification(notification, max_wait=None):
+        sent.append(notification)
+
+    monkeypatch.setattr(coalesce, "send_notification", send_notification)
+    return sent
+
+
+def notification(count: int = 1, chat_id: int = 1) -> Notification:
+    digest = CountDigest(count=count)
+    return Notification(chat_id=chat_id, text=digest.render()[0], thread_key="push:main", digest=digest)
+
+
+def make_coalescer() -> NotificationCoalescer:
+    return NotificationCoalescer(window=60, max_window=120, backlog_scale=10)
+
+
+def test_buffered_notifications_are_held(outbox, sent):
+    async def run() -> None:
+        coalescer = make_coalescer()
+        await coalescer.submit(notification())
+        await coalescer.submit(notification())
+
+        # Still buffered: held in the outbox until after the longest window
+        assert not sent
+        assert [row["delay"] for row in outbox.rows.values()] == [120 + HOLD_GRACE] * 2
+        assert {row["status"] for row in outbox.rows.values()} == {"pending"}
+
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+
+def test_flush_sends_one_merged_message(outbox, sent):
+    async def run() -> None:
+        coalescer = make_coalescer()
+        for _ in range(3):
+            await coalescer.submit(notification())
+        await coalescer.submit(notification(chat_id=2))
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+    assert sorted((n.chat_id, n.text) for n in sent) == [(1, "3 events"), (2, "1 events")]
+    assert outbox.rows == {}
+
+
+def test_rows_taken_by_the_outbox_are_not_sent_again(outbox, sent):
+    async def run() -> None:
+        coalescer = make_coalescer()
+        await coalescer.submit(notification(count=1))
+        await coalescer.submit(notification(count=2))
+        # The hold ran out and a sender claimed the first row
+        outbox.rows[1]["status"] = "processing"
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+    assert [n.text for n in sent] == ["2 events"]
+    assert list(outbox.rows) == [1]
+
+
+def test_rate_limited_rows_are_released(outbox, monkeypatch):
+    async def send_notification(notification, max_wait=None):
+        raise RateLimitExceeded(1, 5.0)
+
+    monkeypatch.setattr(coalesce, "send_notification", send_notification)
+
+    async def run() -> None:
+        coalescer = make_coalescer()
+        await coalescer.submit(notification())
+        await coalescer.submit(notification())
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+    assert [(row["status"], row["delay"]) for row in outbox.rows.values()] == [("pending", 0)] * 2
+    assert not outbox.deferred
+
+
+def test_notifications_are_buffered_when_they_cannot_be_held(outbox, sent, monkeypatch):
+    async def hold(notification, delay):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(outbox, "hold", hold)
+
+    async def run() -> None:
+        coalescer = make_coalescer()
+        await coalescer.submit(notification())
+        await coalescer.submit(notification())
+        await coalescer.flush()
+
+    asyncio.run(run())
+
+    assert [n.text for n in sent] == ["2 events"]
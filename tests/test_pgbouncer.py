@@ -0,0 +1,157 @@
+"""
+The database layer through PgBouncer in transaction pooling mode.
+
+Consecutive transactions of a session may run on different server connections,
+so nothing may depend on state kept on a connection: named prepared statements,
+session-level locks or settings. More concurrent sessions than the pooler has
+server connections make that reuse likely.
+
+Run against a pooler with ``PGBOUNCER_URL`` set; skipped otherwise.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+CONCURRENCY = 30
+ITERATIONS = 20
+
+pytestmark = pytest.mark.usefixtures("schema")
+
+
+@pytest.fixture
+def chat_ids(runner):
+    """Telegram chat IDs unique to a test, with their rows deleted afterwards"""
+    ids = random.sample(range(-(10**12), -(10**11)), CONCURRENCY)
+    yield ids
+
+    from sqlalchemy import delete
+
+    from database import async_session_maker
+    from database.models import Chat, GithubRepository
+
+    async def cleanup() -> None:
+        async with async_session_maker() as session, session.begin():
+            await session.execute(delete(GithubRepository).where(GithubRepository.title.like("pgbouncer-test/%")))
+            await session.execute(delete(Chat).where(Chat.chat_id.in_(ids)))
+
+    runner.run(cleanup())
+
+
+def test_engine_disables_prepared_statement_caches():
+    from database.config import engine
+
+    assert engine.url.query.get("prepared_statement_cache_size") == "0"
+
+
+def test_orm_queries_across_pooled_connections(runner, chat_ids):
+    """The same ORM statements, repeated by many sessions, never collide on a prepared statement"""
+    from database import async_session_maker
+    from database.enums import ChatType
+    from database.models import Chat
+
+    async def session_loop(chat_id: int) -> None:
+        for i in range(ITERATIONS):
+            async with async_session_maker() as session, session.begin():
+                chat, created = await Chat.upsert(
+                    session=session,
+                    values={"chat_id": chat_id, "chat_type": ChatType.GROUP, "title": f"chat {i}"},
+                    conflict=["chat_id"],
+                    update=["title"],
+                )
+                assert created == (i == 0)
+
+            async with async_session_maker() as session:
+                chat = await Chat.get(session, chat_id=chat_id)
+                assert chat.title == f"chat {i}"
+
+    async def run() -> None:
+        await asyncio.gather(*(session_loop(chat_id) for chat_id in chat_ids))
+
+    runner.run(run())
+
+
+def test_bulk_upsert_and_coalesced_reads(runner, chat_ids):
+    from database import async_session_maker
+    from database.enums import ChatType
+    from database.models import Chat, GithubRepository
+
+    async def run() -> None:
+        async with async_session_maker() as session, session.begin():
+            chats = await Chat.bulk_upsert(
+                session,
+                [{"chat_id": chat_id, "chat_type": ChatType.GROUP, "title": "bulk"} for chat_id in chat_ids],
+                conflict=["chat_id"],
+            )
+            await GithubRepository.bulk_upsert(
+                session,
+                [
+                    {
+                        "title": f"pgbouncer-test/{chat.chat_id}",
+                        "url": f"https://github.com/pgbouncer-test/{chat.chat_id}",
+                        "chat_id": chat.id,
+                    }
+                    for chat in chats
+                ],
+                conflict=["title"],
+            )
+
+        async def lookup(chat_id: int) -> None:
+            async with async_session_maker() as session:
+                chat = await Chat.get_by_repo(session, f"pgbouncer-test/{chat_id}")
+                assert chat.chat_id == chat_id
+
+        # Each repository looked up by several requests at once
+        await asyncio.gather(*(lookup(chat_id) for chat_id in chat_ids for _ in range(3)))
+
+    runner.run(run())
+
+
+def test_advisory_lock_is_released_with_its_transaction(runner):
+    from core.locks import advisory_lock
+
+    async def run() -> None:
+        async with advisory_lock("pgbouncer-test") as acquired:
+            assert acquired
+            async with advisory_lock("pgbouncer-test") as contended:
+                assert not contended
+
+        # A session-level lock would stay behind on the server connection
+        async with advisory_lock("pgbouncer-test") as acquired:
+            assert acquired
+
+    runner.run(run())
+
+
+def test_distributed_lock_runs_a_job_once(runner):
+    from core.decorators import distributed_lock
+
+    runs = 0
+
+    @distributed_lock("pgbouncer-test-job")
+    async def job() -> None:
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.5)
+
+    async def run() -> None:
+        await asyncio.gather(*(job() for _ in range(CONCURRENCY)))
+
+    runner.run(run())
+    assert runs == 1
+
+
+def test_lease_is_exclusive(runner):
+    from core.locks import lease
+
+    async def run() -> None:
+        async with lease("pgbouncer-test", ttl=10, holder="first") as first:
+            assert first
+            async with lease("pgbouncer-test", ttl=10, holder="second") as second:
+                assert not second
+
+        async with lease("pgbouncer-test", ttl=10, holder="second") as second:
+            assert second
+
+    runner.run(run())
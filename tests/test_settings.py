@@ -0,0 +1,12 @@
+import pytest
+from pydantic import ValidationError
+
+from config.settings import Settings
+
+
+def test_dedicated_sender_requires_the_outbox():
+    with pytest.raises(ValidationError, match="TG_DEDICATED_SENDER requires TG_OUTBOX_ENABLED"):
+        Settings(_env_file=None, TG_DEDICATED_SENDER=True, TG_OUTBOX_ENABLED=False)
+
+    settings = Settings(_env_file=None, TG_DEDICATED_SENDER=True, TG_OUTBOX_ENABLED=True)
+    assert settings.TG_DEDICATED_SENDER
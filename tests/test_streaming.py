@@ -0,0 +1,157 @@
+"""
+The streaming push decoder against ``json.loads`` and full validation.
+
+Every case is decoded both ways and must give the same result, or both must
+reject it.
+"""
+
+import json
+from urllib.parse import parse_qs, urlencode
+
+import pytest
+
+from handlers.github.models.lean import LeanPushEvent
+from handlers.github.models.streaming import FILE_LISTS, decode_push_payload
+
+WINDOW = 3
+
+
+def make_commit(i: int, **overrides) -> dict:
+    commit = {
+        "id": f"{i:040x}",
+        "tree_id": f"{i:040x}",
+        "distinct": True,
+        "message": f"Commit {i}",
+        "timestamp": "2024-01-01T00:00:00Z",
+        "url": f"https://github.com/octo/repo/commit/{i:040x}",
+        "author": {"name": "Octo", "email": "octo@example.com", "username": "octo"},
+        "committer": {"name": "Octo", "email": "octo@example.com", "username": "octo"},
+        "added": [f"src/added_{i}.py"],
+        "removed": [],
+        "modified": [f"src/modified_{i}_{j}.py" for j in range(i % 4)],
+    }
+    commit.update(overrides)
+    return commit
+
+
+def make_payload(commits: list[dict]) -> dict:
+    return {
+        "ref": "refs/heads/main",
+        "before": "0" * 40,
+        "after": "1" * 40,
+        "compare": "https://github.com/octo/repo/compare/0...1",
+        "created": False,
+        "deleted": False,
+        "forced": False,
+        "commits": commits,
+        "head_commit": commits[-1] if commits else None,
+        "repository": {
+            "full_name": "octo/repo",
+            "html_url": "https://github.com/octo/repo",
+            "topics": [],
+            "owner": {"login": "octo", "html_url": "https://github.com/octo"},
+        },
+        "pusher": {"name": "octo", "email": None},
+        "sender": {"login": "octo", "html_url": "https://github.com/octo"},
+    }
+
+
+def reference(data: bytes | str, window: int = WINDOW) -> dict:
+    """What the streaming decoder should return, computed from the whole document"""
+    payload = json.loads(data)
+    commits = payload["commits"]
+    payload["commits"] = [{k: v for k, v in commit.items() if k not in FILE_LISTS} for commit in commits[-window:]]
+    payload["commit_count"] = len(commits)
+    for key in FILE_LISTS:
+        payload[f"total_{key}"] = sum(len(commit.get(key) or ()) for commit in commits)
+    return payload
+
+
+CASES = {
+    "no commits": [],
+    "one commit": [make_commit(0)],
+    "more commits than the window": [make_commit(i) for i in range(10)],
+    "escapes in file names": [
+        make_commit(0, added=['a "quoted" name.py', "back\\slash", "tab\there", "ü€\U0001f600", "\n"]),
+        make_commit(1, modified=["ends with backslash\\", '"', '\\\\"', "\u0001"]),
+    ],
+    "escapes in other members": [
+        make_commit(0, message='Says "added": ["x"] and {"removed": []}'),
+        make_commit(1, message="\\", author={"name": "ü [o] {x}", "email": None, "username": None}),
+    ],
+    "empty and null file lists": [
+        make_commit(0, added=[], removed=[], modified=[]),
+        make_commit(1, added=None, removed=None, modified=None),
+        make_commit(2),
+    ],
+    "missing file lists": [{k: v for k, v in make_commit(0).items() if k not in FILE_LISTS}],
+    "file lists that are not just strings": [make_commit(0, added=[1, None, {"path": "x"}], modified=[["nested"]])],
+    "commits nested deeper than usual": [make_commit(0, author={"name": "Octo", "extra": {"deep": [1, [2]]}})],
+    "file lists of many files": [make_commit(i, modified=[f"f{j}" for j in range(500)]) for i in range(5)],
+}
+
+
+@pytest.fixture(params=[None, 2], ids=["compact", "indented"])
+def indent(request):
+    return request.param
+
+
+@pytest.mark.parametrize("commits", CASES.values(), ids=CASES.keys())
+def test_matches_json_loads(commits, indent):
+    data = json.dumps(make_payload(commits), indent=indent).encode()
+
+    assert decode_push_payload(data, window=WINDOW) == reference(data)
+
+
+@pytest.mark.parametrize("commits", CASES.values(), ids=CASES.keys())
+def test_matches_full_validation(commits):
+    data = json.dumps(make_payload(commits), ensure_ascii=False).encode()
+
+    assert LeanPushEvent.from_json(data) == LeanPushEvent.model_validate(json.loads(data))
+
+
+def test_form_encoded_payload():
+    """A form-encoded delivery arrives as the ``str`` of its ``payload`` field"""
+    commits = CASES["escapes in file names"]
+    body = urlencode({"payload": json.dumps(make_payload(commits), ensure_ascii=False)})
+    data = parse_qs(body)["payload"][0]
+
+    assert isinstance(data, str)
+    assert decode_push_payload(data, window=WINDOW) == reference(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b'{"commits": [{"added": ["a" "b"]}]}',
+        b'{"commits": [{"added": ["a"] "removed": []}]}',
+        b'{"commits": [{"added": ["a\\x"]}]}',
+        b'{"commits": [{"message": "unterminated}]}',
+        b'{"commits": [], "ref": tru}',
+        b'{"commits": []} trailing',
+        b'{"commits": [],}',
+        b'{"commits": [{"id": "\xff"}]}',
+    ],
+)
+def test_rejects_invalid_json(data):
+    with pytest.raises(ValueError):
+        json.loads(data)
+    with pytest.raises(ValueError):
+        decode_push_payload(data, window=WINDOW)
+
+
+@pytest.mark.parametrize("data", [b"[]", b'"payload"', b'{"commits": {}}', b'{"commits": [1]}'])
+def test_rejects_other_json(data):
+    with pytest.raises(ValueError):
+        decode_push_payload(data, window=WINDOW)
+
+
+@pytest.mark.parametrize("indent", [None, 1])
+def test_rejects_truncated_input(indent):
+    data = json.dumps(make_payload(CASES["escapes in file names"] + CASES["empty and null file lists"]), indent=indent)
+    data = data.encode()
+
+    for end in range(len(data) - 1):
+        with pytest.raises(ValueError):
+            decode_push_payload(data[:end], window=WINDOW)